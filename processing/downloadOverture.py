@@ -15,7 +15,13 @@ Usage:
 
 import duckdb
 import argparse
+import atexit
+import functools
+import json
+import os
+import re
 import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 from tqdm import tqdm
 import mercantile
@@ -25,62 +31,232 @@ PROJECT_ROOT = Path(__file__).resolve().parent.parent
 DATA_DIR = PROJECT_ROOT / "processing" / "data"
 OVERTURE_DATA_DIR = PROJECT_ROOT / "overture" / "data"
 
+# DuckDB database holding one table per downloaded section; output files are
+# exported from it once every section has been downloaded
+OVERTURE_DB_PATH = OVERTURE_DATA_DIR / "overture.duckdb"
+
+# Offset used to keep extent edges that sit exactly on a tile boundary from
+# selecting the neighbouring tile (matches mercantile.tiles)
+LL_EPSILON = 1e-11
+
+# Overture file lists resolved from read_parquet() globs, keyed by glob. The
+# globs name the release, and a release's files never change, so a listing
+# only has to be done once; --refresh-file-lists lists every glob again
+FILE_LIST_CACHE_PATH = OVERTURE_DATA_DIR / "file_lists.json"
+
+# Matches a read_parquet() call on a glob, e.g. read_parquet('s3://.../type=land/*'
+READ_PARQUET_GLOB_PATTERN = re.compile(r"read_parquet\('([^']*\*[^']*)'")
+
+# Patterns used by get_db_url to describe a section
+READ_PARQUET_PATTERN = re.compile(r"read_parquet\('([^']+)'")
+THEME_PATTERN = re.compile(r"theme=([^/]+)")
+TYPE_PATTERN = re.compile(r"type=([^/]+)")
+OUTPUT_FILE_PATTERN = re.compile(r"TO '([^']+)'")
+
+# Matches the path placeholders and extent variables in the SQL template
+TEMPLATE_VARIABLE_PATTERN = re.compile(r"\{\{(?:data_dir|overture_data_dir)\}\}|\$extent_(?:xmin|xmax|ymin|ymax)")
+
+# Matches a section's "COPY (<query>) TO '<file>' <options>" statement
+COPY_SECTION_PATTERN = re.compile(
+    r"^COPY\s*\((?P<query>.*)\)\s*TO\s*'(?P<output>[^']+)'(?P<options>[^;]*);?\s*$",
+    re.DOTALL
+)
+
+# Connection settings applied once before any section runs, so every
+# read_parquet() scan of the remote Overture files inherits them
+DUCKDB_SETUP_SQL = f"""
+INSTALL httpfs;
+LOAD httpfs;
+SET threads={os.cpu_count() or 1};
+SET enable_object_cache=true;
+SET enable_progress_bar=false;
+SET http_keep_alive=true;
+SET prefetch_all_parquet_files=true;
+"""
+
+# On-disk cache for remote Parquet byte ranges, used by the cache_httpfs
+# community extension so repeated runs don't re-fetch the same S3 data
+HTTPFS_CACHE_DIR = DATA_DIR / "httpfs_cache"
+
+def enable_httpfs_cache(conn, verbose=True):
+    """Load cache_httpfs on a connection, falling back to plain httpfs if unavailable"""
+    try:
+        conn.execute("INSTALL cache_httpfs FROM community")
+        conn.execute("LOAD cache_httpfs")
+        conn.execute("SET cache_httpfs_type='on_disk'")
+        conn.execute(f"SET cache_httpfs_cache_directory='{HTTPFS_CACHE_DIR}'")
+    except duckdb.Error as e:
+        if verbose:
+            print(f"cache_httpfs unavailable, reading Overture without a local cache: {e}")
+
+@functools.lru_cache(maxsize=1)
+def get_connection():
+    """Return the DuckDB connection shared by every download in this process
+    
+    Extensions, settings, the object cache and the attached overture database
+    are set up once and reused when download_overture_data is called
+    repeatedly, e.g. for several extents. Callers work on their own cursor.
+    """
+    OVERTURE_DATA_DIR.mkdir(parents=True, exist_ok=True)
+    HTTPFS_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+
+    conn = duckdb.connect()
+    conn.execute(DUCKDB_SETUP_SQL)
+    enable_httpfs_cache(conn)
+    conn.execute(f"ATTACH '{OVERTURE_DB_PATH}' AS ov")
+    atexit.register(conn.close)
+    return conn
+
 def snap_to_tile_bounds(extent, zoom=8):
-    """Snap extent to align with slippy tile boundaries to prevent rendering artifacts"""
+    """Snap extent to align with slippy tile boundaries to prevent rendering artifacts
+    
+    The extent must not cross the antimeridian (xmin <= xmax), since the
+    template's bbox filters can't express a wrapped extent.
+    """
     xmin, ymin, xmax, ymax = extent
-    tiles = list(mercantile.tiles(xmin, ymin, xmax, ymax, zoom))
-    if not tiles:
-        return extent
-
-    snapped = mercantile.bounds(tiles[0])
-    for t in tiles[1:]:
-        b = mercantile.bounds(t)
-        snapped = mercantile.LngLatBbox(
-            min(snapped.west, b.west),
-            min(snapped.south, b.south),
-            max(snapped.east, b.east),
-            max(snapped.north, b.north)
-        )
-    return (snapped.west, snapped.south, snapped.east, snapped.north)
+    # Only the top-left and bottom-right tiles matter. Clamp to the web
+    # mercator world, and nudge the east/south edges inward like
+    # mercantile.tiles does so an edge on a tile boundary doesn't add a tile
+    xmin, xmax = max(xmin, -180.0), min(xmax, 180.0)
+    ymin, ymax = max(ymin, -85.051129), min(ymax, 85.051129)
+    nw = mercantile.bounds(mercantile.tile(xmin, ymax, zoom))
+    se = mercantile.bounds(mercantile.tile(xmax - LL_EPSILON, ymin + LL_EPSILON, zoom))
+    return (nw.west, se.south, se.east, nw.north)
 
 def get_db_url(sql_section):
     """Extract URL and metadata from SQL section for progress reporting"""
-    lines = sql_section.strip().split('\n')
-    
+    url_match = READ_PARQUET_PATTERN.search(sql_section)
+    to_match = OUTPUT_FILE_PATTERN.search(sql_section)
+    if not url_match and not to_match:
+        return None
+    # Sections that copy from a table loaded by an earlier section have no URL
+    url = url_match.group(1) if url_match else "local table"
+
+    # Extract data type from URL or TO clause
+    data_type = "unknown"
+    theme_match = THEME_PATTERN.search(url)
+    type_match = TYPE_PATTERN.search(url)
+    if theme_match and type_match:
+        data_type = f"{theme_match.group(1)}/{type_match.group(1)}"
+
+    # Extract output file from TO clause
+    output_file = Path(to_match.group(1)).name if to_match else "unknown"
+
+    return {
+        "url": url,
+        "description": data_type,
+        "output_file": output_file
+    }
+
+def iter_sections(lines):
+    """Yield the stripped SQL sections separated by '-- breakpoint' lines"""
+    section = []
     for line in lines:
-        if 'read_parquet(' in line:
-            # Extract URL from read_parquet call
-            import re
-            url_match = re.search(r"read_parquet\('([^']+)'", line)
-            if url_match:
-                url = url_match.group(1)
-                
-                # Extract data type from URL or TO clause
-                data_type = "unknown"
-                if 'theme=' in url:
-                    theme_match = re.search(r'theme=([^/]+)', url)
-                    type_match = re.search(r'type=([^/]+)', url)
-                    if theme_match and type_match:
-                        data_type = f"{theme_match.group(1)}/{type_match.group(1)}"
-                
-                # Extract output file from TO clause
-                output_file = "unknown"
-                for to_line in lines:
-                    if "TO '" in to_line:
-                        to_match = re.search(r"TO '([^']+)'", to_line)
-                        if to_match:
-                            output_file = Path(to_match.group(1)).name
-                            break
-                
-                return {
-                    "url": url,
-                    "description": data_type,
-                    "output_file": output_file
-                }
+        if line.strip() == '-- breakpoint':
+            yield ''.join(section).strip()
+            section.clear()
+        else:
+            section.append(line)
+    yield ''.join(section).strip()
+
+def load_file_lists():
+    """Load the cached Overture file lists, or an empty cache"""
+    try:
+        with open(FILE_LIST_CACHE_PATH) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_file_lists(file_lists, globs):
+    """Store the Overture file lists of the given globs for the next run
     
-    return None
+    Lists of globs the template no longer uses, e.g. from an older release,
+    are dropped, and empty lists aren't kept so those globs are listed again.
+    """
+    with open(FILE_LIST_CACHE_PATH, 'w') as f:
+        json.dump({glob: file_lists[glob] for glob in globs if file_lists.get(glob)}, f)
+
+def expand_file_lists(conn, sql_section, file_lists):
+    """Replace read_parquet() globs with explicit file lists
+    
+    Listing a remote prefix costs a round of LIST/HEAD requests before any data
+    is read, so each glob is resolved once with DuckDB's glob() and kept in
+    file_lists. Globs that can't be listed are left as they are.
+    """
+    def replace(match):
+        pattern = match.group(1)
+        if pattern not in file_lists:
+            try:
+                file_lists[pattern] = [row[0] for row in conn.execute("SELECT file FROM glob(?)", [pattern]).fetchall()]
+            except duckdb.Error:
+                return match.group(0)
+        if not file_lists[pattern]:
+            return match.group(0)
+        return "read_parquet([" + ', '.join(f"'{path}'" for path in file_lists[pattern]) + "]"
 
-def download_overture_data(extent, buffer_degrees=0.2, template_path=None, verbose=True):
+    return READ_PARQUET_GLOB_PATTERN.sub(replace, sql_section)
+
+def warm_footer_cache(conn, file_lists):
+    """Read the Parquet footers of every listed Overture file ahead of the downloads
+    
+    The footers land in DuckDB's object cache (and cache_httpfs when loaded),
+    so the sections themselves skip the first round of footer requests. Each
+    file list is read on its own cursor in parallel; failures are ignored since
+    the sections will simply fetch the footers themselves.
+    """
+    def read_footers(paths):
+        cursor = conn.cursor()
+        try:
+            cursor.execute("SELECT count(*) FROM parquet_file_metadata(?)", [paths]).fetchone()
+        except duckdb.Error:
+            pass
+        finally:
+            cursor.close()
+
+    lists = [paths for paths in file_lists.values() if paths]
+    if lists:
+        with ThreadPoolExecutor(max_workers=min(8, len(lists))) as executor:
+            list(executor.map(read_footers, lists))
+
+def set_variables(conn, variables):
+    """Bind DuckDB variables (read with getvariable()) on a connection"""
+    for name, value in variables.items():
+        conn.execute(f"SET VARIABLE {name} = ?", [value])
+
+def run_section(conn, section, variables):
+    """Execute a SQL section on its own cursor of a shared connection
+    
+    DuckDB connections can't run queries from several threads at once, but
+    cursors of the same connection share its database, extensions and settings.
+    Variables are per connection, so they are bound again on the cursor.
+    
+    A COPY section is stored as a table in the attached overture database
+    instead of being written out directly. Returns (table, output, options)
+    for export_section, or None for other sections.
+    """
+    cursor = conn.cursor()
+    try:
+        set_variables(cursor, variables)
+        match = COPY_SECTION_PATTERN.match(section)
+        if not match:
+            cursor.execute(section)
+            return None
+
+        table = Path(match.group('output')).stem
+        cursor.execute(f'CREATE OR REPLACE TABLE ov."{table}" AS {match.group("query")}')
+        return table, match.group('output'), match.group('options')
+    finally:
+        cursor.close()
+
+def export_section(conn, table, output, options):
+    """Write a downloaded table to its output file"""
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"COPY ov.\"{table}\" TO '{output}'{options}")
+    finally:
+        cursor.close()
+
+def download_overture_data(extent, buffer_degrees=0.2, template_path=None, verbose=True, refresh_file_lists=False):
     """Download and process source data from Overture Maps
     
     Args:
@@ -88,6 +264,8 @@ def download_overture_data(extent, buffer_degrees=0.2, template_path=None, verbo
         buffer_degrees (float): Buffer around extent in degrees (default: 0.2)
         template_path (str|Path): Path to SQL template file (default: tileQueries.template)
         verbose (bool): Show progress information (default: True)
+        refresh_file_lists (bool): List the Overture files again instead of
+            using the cached lists (default: False)
     
     Returns:
         dict: Results including processed files and any errors
@@ -117,6 +295,7 @@ def download_overture_data(extent, buffer_degrees=0.2, template_path=None, verbo
     # Ensure directories exist
     DATA_DIR.mkdir(parents=True, exist_ok=True)
     OVERTURE_DATA_DIR.mkdir(parents=True, exist_ok=True)
+    HTTPFS_CACHE_DIR.mkdir(parents=True, exist_ok=True)
     
     # Read the SQL template file
     if template_path is None:
@@ -127,24 +306,34 @@ def download_overture_data(extent, buffer_degrees=0.2, template_path=None, verbo
     if not template_path.exists():
         raise FileNotFoundError(f"SQL template file not found: {template_path}")
     
-    with open(template_path, 'r') as file:
-        template_content = file.read()
-
-    # Replace template variables with actual paths
-    sql_content = template_content.replace('{{data_dir}}', str(DATA_DIR))
-    sql_content = sql_content.replace('{{overture_data_dir}}', str(OVERTURE_DATA_DIR))
-    
-    # Replace the extent variables with buffered extent
-    sql_content = sql_content.replace('$extent_xmin', str(buffered_xmin))
-    sql_content = sql_content.replace('$extent_xmax', str(buffered_xmax))
-    sql_content = sql_content.replace('$extent_ymin', str(buffered_ymin))
-    sql_content = sql_content.replace('$extent_ymax', str(buffered_ymax))
+    # Replace the path placeholders and point the extent variables at DuckDB
+    # variables; the buffered extent is bound once per connection instead of
+    # being pasted into every query
+    substitutions = {
+        '{{data_dir}}': str(DATA_DIR),
+        '{{overture_data_dir}}': str(OVERTURE_DATA_DIR),
+    }
+    for name in ('xmin', 'xmax', 'ymin', 'ymax'):
+        substitutions[f'$extent_{name}'] = f"getvariable('extent_{name}')"
+    extent_variables = {
+        'extent_xmin': buffered_xmin,
+        'extent_xmax': buffered_xmax,
+        'extent_ymin': buffered_ymin,
+        'extent_ymax': buffered_ymax,
+    }
 
-    # Split the SQL content into sections based on '-- breakpoint'
-    sql_sections = sql_content.split('-- breakpoint')
+    # Read the template line by line, substituting as it goes, and collect the
+    # sections between '-- breakpoint' lines in the same pass
+    with open(template_path, 'r') as file:
+        lines = (TEMPLATE_VARIABLE_PATTERN.sub(lambda m: substitutions[m.group(0)], line) for line in file)
+        valid_sections = [
+            (i, section) for i, section in enumerate(iter_sections(lines))
+            if section and not section.startswith('SET extent_')  # Skip empty sections and SET commands
+        ]
 
     # Connect to DuckDB
-    conn = duckdb.connect()
+    conn = get_connection().cursor()
+    set_variables(conn, extent_variables)
     
     results = {
         "success": True,
@@ -154,44 +343,116 @@ def download_overture_data(extent, buffer_degrees=0.2, template_path=None, verbo
     }
 
     # Create a progress bar for the overall process
-    valid_sections = [s for s in sql_sections if s.strip() and not s.strip().startswith('SET extent_')]
-    
     if verbose:
         progress_bar = tqdm(total=len(valid_sections), desc="Overall progress", unit="section", position=0, leave=True)
     
     try:
-        # Execute each section
-        for i, section in enumerate(sql_sections):
-            section = section.strip()
-            if section and not section.startswith('SET extent_'):  # Skip empty sections and SET commands
-                # Extract URL and data type from the section
-                url_info = get_db_url(section)
-                if url_info and verbose:
-                    desc = f"Section {i + 1}: {url_info['description']}"
-                    tqdm.write(f"Executing {desc}")
-                    tqdm.write(f"  -> Querying: {url_info['url']}")
-                    tqdm.write(f"  -> Output: {url_info['output_file']}")
-                    results["output_files"].append(url_info['output_file'])
-                elif verbose:
-                    desc = f"Section {i + 1}"
-                    tqdm.write(f"Executing {desc}...")
-                
-                try:
-                    # Execute the SQL section
-                    conn.execute(section)
+        # Run any setup statements (INSTALL/LOAD/SET) ahead of a section's COPY
+        # on the shared connection first, so every query sees them. Sections
+        # without a COPY, such as CREATE VIEW stages that later sections read
+        # from, also run here in file order; views stay lazy, so their filters
+        # are pushed down into the COPY queries that use them
+        copy_sections = []
+        setup_failed = False
+        file_lists = {} if refresh_file_lists else load_file_lists()
+        for i, section in valid_sections:
+            copy_start = section.find('COPY')
+            try:
+                if copy_start < 0:
+                    conn.execute(expand_file_lists(conn, section, file_lists))
                     results["processed_sections"] += 1
-                    
+                else:
+                    if copy_start > 0:
+                        conn.execute(section[:copy_start])
+                        section = section[copy_start:]
+                    copy_sections.append((i, expand_file_lists(conn, section, file_lists)))
+            except Exception as e:
+                setup_failed = True
+                error_msg = f"Error executing section {i + 1}: {str(e)}"
+                results["errors"].append(error_msg)
+                if verbose:
+                    tqdm.write(f"ERROR: {error_msg}")
+                    progress_bar.update(1)
+                continue
+            if copy_start < 0:
+                if verbose:
+                    progress_bar.update(1)
+                continue
+
+            # Extract URL and data type from the section, and report it with a
+            # single write so concurrent sections don't contend for tqdm's lock
+            url_info = get_db_url(section)
+            if url_info and verbose:
+                desc = f"Section {i + 1}: {url_info['description']}"
+                tqdm.write("\n".join([
+                    f"Queueing {desc}",
+                    f"  -> Querying: {url_info['url']}",
+                    f"  -> Output: {url_info['output_file']}",
+                ]))
+                results["output_files"].append(url_info['output_file'])
+            elif verbose:
+                desc = f"Section {i + 1}"
+                tqdm.write(f"Queueing {desc}...")
+
+        # The COPY sections can't be trusted to run without the setup that
+        # failed, so don't start any of them
+        if setup_failed:
+            for i, _ in copy_sections:
+                results["errors"].append(f"Skipped section {i + 1}: setup failed")
+            if verbose:
+                tqdm.write(f"Skipping {len(copy_sections)} COPY sections.")
+                progress_bar.update(len(copy_sections))
+            copy_sections = []
+
+        used_globs = {glob for _, section in valid_sections for glob in READ_PARQUET_GLOB_PATTERN.findall(section)}
+        save_file_lists(file_lists, used_globs)
+        warm_footer_cache(conn, {glob: file_lists[glob] for glob in used_globs if glob in file_lists})
+
+        # Each section reads a different Overture theme/type, so they can run
+        # concurrently
+        exports = []
+        if copy_sections:
+            with ThreadPoolExecutor(max_workers=min(8, len(copy_sections))) as executor:
+                futures = {
+                    executor.submit(run_section, conn, section, extent_variables): i
+                    for i, section in copy_sections
+                }
+                for future in as_completed(futures):
+                    i = futures[future]
+                    try:
+                        export = future.result()
+                        if export:
+                            exports.append((i, export))
+                        else:
+                            results["processed_sections"] += 1
+                    except Exception as e:
+                        error_msg = f"Error executing section {i + 1}: {str(e)}"
+                        results["errors"].append(error_msg)
+                        if verbose:
+                            tqdm.write(f"ERROR: {error_msg}")
                     if verbose:
                         progress_bar.update(1)
-                    
-                except Exception as e:
-                    error_msg = f"Error executing section {i + 1}: {str(e)}"
-                    results["errors"].append(error_msg)
-                    if verbose:
-                        tqdm.write(f"ERROR: {error_msg}")
+
+        # Write every output file from the local tables in one pass at the end
+        if exports:
+            with ThreadPoolExecutor(max_workers=min(8, len(exports))) as executor:
+                futures = {
+                    executor.submit(export_section, conn, *export): i
+                    for i, export in exports
+                }
+                for future in as_completed(futures):
+                    i = futures[future]
+                    try:
+                        future.result()
+                        results["processed_sections"] += 1
+                    except Exception as e:
+                        error_msg = f"Error exporting section {i + 1}: {str(e)}"
+                        results["errors"].append(error_msg)
+                        if verbose:
+                            tqdm.write(f"ERROR: {error_msg}")
                     
     finally:
-        # Close the connection
+        # Close this call's cursor; the shared connection stays open
         conn.close()
         if verbose:
             progress_bar.close()
@@ -217,6 +478,8 @@ def main():
                         help='Path to SQL template file (default: tileQueries.template)')
     parser.add_argument('--verbose', action='store_true', default=True,
                         help='Show detailed progress information')
+    parser.add_argument('--refresh-file-lists', action='store_true',
+                        help='List the Overture files again instead of using the cached lists')
     
     args = parser.parse_args()
     
@@ -225,7 +488,10 @@ def main():
         extent_parts = args.extent.split(',')
         if len(extent_parts) != 4:
             raise ValueError("Extent must have 4 values")
-        extent = tuple(float(x) for x in extent_parts)
+        extent = tuple(map(float, extent_parts))
+        xmin, ymin, xmax, ymax = extent
+        if not (-180 <= xmin <= xmax <= 180 and -90 <= ymin <= ymax <= 90):
+            raise ValueError("Extent must satisfy -180 <= xmin <= xmax <= 180 and -90 <= ymin <= ymax <= 90")
     except ValueError as e:
         print(f"Error parsing extent: {e}")
         print("Extent format: xmin,ymin,xmax,ymax")
@@ -236,7 +502,8 @@ def main():
         extent=extent,
         buffer_degrees=args.buffer,
         template_path=args.template,
-        verbose=args.verbose
+        verbose=args.verbose,
+        refresh_file_lists=args.refresh_file_lists
     )
     
     if results["success"]:
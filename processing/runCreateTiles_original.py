@@ -15,6 +15,13 @@ Usage:
 """
 
 import os
+import re
+import atexit
+import shutil
+import functools
+import hashlib
+import math
+import mmap
 import subprocess
 import fnmatch
 import time
@@ -22,8 +29,9 @@ from tqdm import tqdm
 import sys
 import json
 import argparse
+import mercantile
 from pathlib import Path
-from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 
 # Set up project paths
 PROJECT_ROOT = Path(__file__).resolve().parent.parent
@@ -31,77 +39,265 @@ DATA_DIR = PROJECT_ROOT / "processing" / "data"
 TILE_DIR = PROJECT_ROOT / "processing" / "tiles"
 OVERTURE_DATA_DIR = PROJECT_ROOT / "overture" / "data"
 PUBLIC_TILES_DIR = PROJECT_ROOT / "public" / "tiles"
+
+# Debug/verbose output, read once from the command line
+DEBUG = '--debug' in sys.argv or '--verbose' in sys.argv
+
+# Rebuild every PMTiles file even when its stamp says it is up to date
+FORCE = '--force' in sys.argv
+
+# Number of SQL sections downloaded at once; kept moderate to avoid S3 throttling
+DOWNLOAD_WORKERS = 8
+
+# DuckDB worker threads and memory limit (e.g. '12GB'), overridable from the
+# environment; without DUCKDB_MEM DuckDB's own default limit applies
+DUCKDB_THREADS = int(os.environ.get('DUCKDB_THREADS') or os.cpu_count() or 1)
+DUCKDB_MEM = os.environ.get('DUCKDB_MEM')
+
+# Setup run on every cursor that executes a SQL section. The cursors share one
+# database, so the HTTP metadata and Parquet footer caches and the kept-alive
+# connections carry over between sections, but settings made by the template's
+# own INSTALL/LOAD/SET block only apply to the cursor that runs it. DuckDB's
+# own progress bar is off since concurrent sections would draw over tqdm's.
+SECTION_SETUP_SQL = f"""
+INSTALL spatial; LOAD spatial;
+INSTALL httpfs; LOAD httpfs;
+SET s3_region='us-west-2';
+SET threads={DUCKDB_THREADS};
+SET http_keep_alive=true;
+SET http_retries=5;
+SET http_retry_backoff=2;
+SET enable_http_metadata_cache=true;
+SET enable_object_cache=true;
+SET parquet_metadata_cache=true;
+SET enable_progress_bar=false;
+"""
+if DUCKDB_MEM:
+    SECTION_SETUP_SQL += f"SET memory_limit='{DUCKDB_MEM}';\n"
+
+# Number of files tiled at once; tippecanoe is multithreaded itself, so the
+# cores are divided between the concurrent runs
+TILE_WORKERS = max(1, (os.cpu_count() or 1) // 2)
+
+# Tippecanoe runs each file worker keeps going at once (zoom levels, or
+# building LODs); kept small since tippecanoe is already multithreaded
+TIPPECANOE_RUNS_PER_FILE = 3
+
+# Start of a FeatureCollection's features array, and the whitespace/commas
+# between its elements, used to stream features without json.load
+FEATURES_ARRAY_PATTERN = re.compile(r'"features"\s*:\s*\[')
+FEATURE_SEPARATOR_PATTERN = re.compile(r'[\s,]*')
+
+# Geometry types detected on earlier runs, and how long (in seconds) an
+# entry is kept before the file is sampled again
+GEOMETRY_CACHE_PATH = TILE_DIR / ".geomcache.json"
+GEOMETRY_CACHE_MAX_AGE = 30 * 24 * 60 * 60
+
+# Extensions of the files process_to_tiles picks up from the data directories
+GEOJSON_SUFFIXES = {'.geojson', '.geojsonseq'}
+
+# Longest line read when sniffing whether a .geojson file is line-delimited
+SNIFF_LINE_LIMIT = 1 << 20
+
+# The "type" member of a feature's geometry object, matched in the raw file
+# bytes so geometry detection doesn't have to decode the features
+GEOMETRY_TYPE_PATTERN = re.compile(rb'"geometry"\s*:\s*\{[^}]*?"type"\s*:\s*"([^"]+)"')
+
+# Nudge applied to an extent's east/south edges when snapping to tiles
+LL_EPSILON = 1e-11
+
+# Overture's public releases are laid out as theme=<theme>/type=<type>/*.parquet
+# without quadkey= partitions, so pointing read_parquet at quadkey paths would
+# find no files. Enable this only for a quadkey-partitioned mirror.
+QUADKEY_PARTITIONED = False
+
+# Overture read_parquet() globs rewritten by optimize_sql_with_quadkeys, up to
+# the end of the URL argument; the remaining arguments are found by
+# find_call_end. Release names include beta tags like 2024-04-16-beta.0, so
+# any path segment is accepted there; no group can run past a quote or slash,
+# which keeps matching linear on malformed templates.
+S3_PARQUET_PATTERN = re.compile(r"read_parquet\(\s*'(s3://overturemaps-us-west-2/release/[^/']+/theme=([^/']+)/type=([^/']+)/\*)'")
+AZURE_PARQUET_PATTERN = re.compile(r"read_parquet\(\s*'(az://overturemapswestus2\.blob\.core\.windows\.net/release/[^/']+/theme=([^/']+)/type=([^/']+)/\*)'")
+S3_PLACES_PARQUET_PATTERN = re.compile(r"read_parquet\(\s*'(s3://overturemaps-us-west-2/release/[^/']+/theme=([^/']+)/\*)/\*'")
+
+# All three of the above in one pattern: groups 1-3 are the S3 match, 4-6 the
+# Azure match and 7-8 the places match
+OVERTURE_PARQUET_PATTERN = re.compile("|".join(
+    pattern.pattern for pattern in (S3_PARQUET_PATTERN, AZURE_PARQUET_PATTERN, S3_PLACES_PARQUET_PATTERN)
+))
+
+def lon_to_tile_x(lon, zoom):
+    """Get the slippy tile column containing a longitude"""
+    n = 2 ** zoom
+    return min(n - 1, max(0, int((lon + 180.0) / 360.0 * n)))
+
+def lat_to_tile_y(lat, zoom):
+    """Get the slippy tile row containing a latitude, clamped to web mercator"""
+    n = 2 ** zoom
+    lat = max(-85.051129, min(85.051129, lat))
+    y = (1.0 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2.0 * n
+    return min(n - 1, max(0, int(y)))
+
+def spread_bits(v):
+    """Spread the low 32 bits of v out to the even bit positions of a 64-bit int"""
+    v &= 0xFFFFFFFF
+    v = (v | (v << 16)) & 0x0000FFFF0000FFFF
+    v = (v | (v << 8)) & 0x00FF00FF00FF00FF
+    v = (v | (v << 4)) & 0x0F0F0F0F0F0F0F0F
+    v = (v | (v << 2)) & 0x3333333333333333
+    v = (v | (v << 1)) & 0x5555555555555555
+    return v
+
+# Base-4 digits of every byte value, most significant first
+QUADKEY_BYTE_DIGITS = [''.join(str((b >> shift) & 3) for shift in (6, 4, 2, 0)) for b in range(256)]
+
+def tile_to_quadkey(x, y, zoom):
+    """Convert slippy tile coordinates to a Bing-style QuadKey string
     
-    def replace_url(match, url_type="s3"):
-        original_url = match.group(1)
-        theme = match.group(2)
-        data_type = match.group(3) if len(match.groups()) >= 3 else "unknown"
-        additional_params = match.group(4) if len(match.groups()) >= 4 else ""
-        
-        # Get optimized paths for this URL
-        optimized_paths = optimize_parquet_paths(original_url, quadkeys, url_type)
-        
-        # Create array of paths for read_parquet
-        paths_array = "[" + ", ".join(f"'{path}'" for path in optimized_paths) + "]"
-        
-        # Reconstruct the read_parquet call with the optimized paths
-        result = f"read_parquet({paths_array}{additional_params})"
-        
-        # Log the optimization
-        print(f"  Optimized {theme}/{data_type} ({url_type.upper()}): {len(optimized_paths)} partitions (was: full dataset)")
-        
-        return result
+    Interleaving the bits of x and y gives the Morton code of the tile, whose
+    base-4 digits are the QuadKey digits (x bit + 2 * y bit).
+    """
+    if zoom == 0:
+        return ""
+    morton = spread_bits(x) | (spread_bits(y) << 1)
+    digits = ''.join(QUADKEY_BYTE_DIGITS[b] for b in morton.to_bytes((zoom + 3) // 4, 'big'))
+    return digits[-zoom:]
+
+def get_quadkeys_for_extent(xmin, ymin, xmax, ymax, zoom=6):
+    """Get the QuadKeys of every tile at the given zoom intersecting an extent
+    
+    Latitudes are clamped to the web mercator limits. Like the rest of the
+    pipeline, this expects an extent that doesn't cross the antimeridian.
+    """
+    # Each QuadKey digit is x_bit + 2 * y_bit. Writing a column's bits as a
+    # decimal number (x=5 -> 101) and a row's doubled (y=3 -> 22) means their
+    # sum spells the QuadKey directly with no carries, so the per-bit work is
+    # done once per column and row instead of once per tile.
+    x_digits = [int(format(x, 'b')) for x in range(lon_to_tile_x(xmin, zoom), lon_to_tile_x(xmax, zoom) + 1)]
+    y_digits = [2 * int(format(y, 'b')) for y in range(lat_to_tile_y(ymax, zoom), lat_to_tile_y(ymin, zoom) + 1)]
+    return [str(xd + yd).zfill(zoom) for xd in x_digits for yd in y_digits]
+
+def quadkey_parquet_source(original_url, quadkeys, additional_params=""):
+    """Build a read_parquet() source limited to the given QuadKey partitions
+    
+    Rather than naming each partition path, which fails on the first QuadKey
+    that has no files, this globs every quadkey= partition and filters on the
+    hive partition column. DuckDB prunes files on that filter before reading
+    them, and QuadKeys with no partition simply match nothing.
+    """
+    base_path = original_url[:-2] if original_url.endswith('/*') else original_url
+    if 'hive_partitioning' not in additional_params:
+        additional_params += ", hive_partitioning=1"
+    return (f"(SELECT * FROM read_parquet('{base_path}/quadkey=*/*.parquet'{additional_params}) "
+            f"WHERE quadkey IN ({quadkey_sql_list(tuple(quadkeys))}))")
+
+@functools.lru_cache(maxsize=16)
+def quadkey_sql_list(quadkeys):
+    """Format QuadKeys as the items of a SQL IN list, once per distinct tuple"""
+    return ", ".join(f"'{quadkey}'" for quadkey in quadkeys)
+
+# Overture sources recognized by get_db_url: the OVERTURE_PARQUET_PATTERN
+# groups holding each alternative's URL, theme and data type, with the
+# description shown for it, plus the output path of a section's COPY ... TO
+DB_URL_SOURCES = (
+    ((1, 2, 3), "Downloading {data_type} data from Overture Maps ({theme} theme)"),
+    ((4, 5, 6), "Downloading {data_type} data from Overture Maps ({theme} theme)"),
+    # Places pattern (special case with wildcards, so no data type)
+    ((7, 8, None), "Downloading {theme} data from Overture Maps"),
+)
+OUTPUT_FILE_PATTERN = re.compile(r"TO '([^']+)'")
+
+def find_call_end(sql, pos):
+    """Find the index just past the ')' closing a call whose arguments continue at pos
     
-    def replace_s3_url(match):
-        return replace_url(match, "s3")
+    Quoted strings and nested parentheses are skipped, so arguments may span
+    lines or contain calls and literals with parentheses. Returns -1 if the
+    call is never closed.
+    """
+    depth = 0
+    quote = None
+    for i in range(pos, len(sql)):
+        c = sql[i]
+        if quote:
+            if c == quote:
+                quote = None
+        elif c in "'\"":
+            quote = c
+        elif c == '(':
+            depth += 1
+        elif c == ')':
+            if depth == 0:
+                return i + 1
+            depth -= 1
+    return -1
+
+def rewrite_parquet_calls(sql_content, pattern, replace):
+    """Replace each read_parquet() call matched by pattern with replace(match, additional_params)
     
-    def replace_azure_url(match):
-        return replace_url(match, "azure")
+    Calls on commented-out lines are left alone.
+    """
+    pieces = []
+    last = 0
+    for match in pattern.finditer(sql_content):
+        line_start = sql_content.rfind('\n', 0, match.start()) + 1
+        if match.start() < last or '--' in sql_content[line_start:match.start()]:
+            continue
+        end = find_call_end(sql_content, match.end())
+        if end < 0:
+            continue
+        pieces.append(sql_content[last:match.start()])
+        pieces.append(replace(match, sql_content[match.end():end - 1]))
+        last = end
+    pieces.append(sql_content[last:])
+    return ''.join(pieces)
+
+def optimize_sql_with_quadkeys(sql_content, quadkeys):
+    """Rewrite Overture read_parquet() globs to read only the given QuadKey partitions
     
-    def replace_s3_places_url(match):
-        # Special handler for places URLs with /*/* structure
-        original_url = match.group(1)
-        theme = match.group(2)
-        additional_params = match.group(3)
-        
-        # For places, we need to handle the /*/* structure
-        optimized_paths = optimize_parquet_paths(original_url + "/*", quadkeys, "s3")
-        
-        # Create array of paths for read_parquet
-        paths_array = "[" + ", ".join(f"'{path}'" for path in optimized_paths) + "]"
-        
-        # Reconstruct the read_parquet call with the optimized paths
-        result = f"read_parquet({paths_array}{additional_params})"
+    All three URL types are matched by OVERTURE_PARQUET_PATTERN, so the SQL
+    is scanned and rebuilt once.
+    """
+    # Deduplicate and sort once so every rewritten call shares one IN list
+    quadkeys = tuple(sorted(set(quadkeys)))
+    
+    def replace_url(match, additional_params):
+        if match.group(1):
+            url_type = "s3"
+            original_url, theme, data_type = match.group(1, 2, 3)
+        elif match.group(4):
+            url_type = "azure"
+            original_url, theme, data_type = match.group(4, 5, 6)
+        else:
+            # Places URLs have a /*/* structure instead of a type= partition
+            url_type = "s3"
+            original_url = match.group(7) + "/*"
+            theme = match.group(8)
+            data_type = "all"
         
         # Log the optimization
-        print(f"  Optimized {theme}/all (S3): {len(optimized_paths)} partitions (was: full dataset)")
+        print(f"  Optimized {theme}/{data_type} ({url_type.upper()}): {len(quadkeys)} partitions (was: full dataset)")
         
-        return result
-    
-    # Apply the optimization to all URL types
-    optimized_sql = re.sub(s3_pattern, replace_s3_url, sql_content)
-    optimized_sql = re.sub(azure_pattern, replace_azure_url, optimized_sql)
-    optimized_sql = re.sub(s3_places_pattern, replace_s3_places_url, optimized_sql)
+        return quadkey_parquet_source(original_url, quadkeys, additional_params)
     
-    return optimized_sql
+    return rewrite_parquet_calls(sql_content, OVERTURE_PARQUET_PATTERN, replace_url)
 
 def snap_to_tile_bounds(extent, zoom=8):
-    """Snap extent to align with slippy tile boundaries to prevent rendering artifacts"""
+    """Snap extent to align with slippy tile boundaries to prevent rendering artifacts
+    
+    The extent must not cross the antimeridian (xmin <= xmax), since the
+    template's bbox filters can't express a wrapped extent.
+    """
     xmin, ymin, xmax, ymax = extent
-    tiles = list(mercantile.tiles(xmin, ymin, xmax, ymax, zoom))
-    if not tiles:
-        return extent
-    
-    snapped = mercantile.bounds(tiles[0])
-    for t in tiles[1:]:
-        b = mercantile.bounds(t)
-        snapped = mercantile.LngLatBbox(
-            min(snapped.west, b.west),
-            min(snapped.south, b.south),
-            max(snapped.east, b.east),
-            max(snapped.north, b.north),
-        )
-    return (snapped.west, snapped.south, snapped.east, snapped.north)
+    # Only the top-left and bottom-right tiles matter. Clamp to the web
+    # mercator world, and nudge the east/south edges inward like
+    # mercantile.tiles does so an edge on a tile boundary doesn't add a tile.
+    # mercantile.tile picks the corner tiles, so an edge lying exactly on a
+    # tile boundary lands in the same row and column as mercantile.tiles
+    xmin, xmax = max(xmin, -180.0), min(xmax, 180.0)
+    ymin, ymax = max(ymin, -85.051129), min(ymax, 85.051129)
+    nw = mercantile.bounds(mercantile.tile(xmin, ymax, zoom))
+    se = mercantile.bounds(mercantile.tile(xmax - LL_EPSILON, ymin + LL_EPSILON, zoom))
+    return (nw.west, se.south, se.east, nw.north)
 
 # extent parameters for New York State
 # extent_xmin = -79.76259
@@ -132,8 +328,14 @@ raw_extent = (20.0, -7.0, 26.0, -3.0)  # (xmin, ymin, xmax, ymax)
 snapped_extent = snap_to_tile_bounds(raw_extent, zoom=8)
 extent_xmin, extent_ymin, extent_xmax, extent_ymax = snapped_extent
 
-print(f"Raw extent: {raw_extent}")
-print(f"Snapped extent: {snapped_extent}")
+# Map extent as tippecanoe's --clip-bounding-box value, shared by every command
+clip_bounding_box = f"{extent_xmin},{extent_ymin},{extent_xmax},{extent_ymax}"
+
+# Only report the extent when run as a script (or debugging), not on every
+# import, e.g. from a notebook or in each tiling worker process
+if __name__ == "__main__" or DEBUG:
+    print(f"Raw extent: {raw_extent}")
+    print(f"Snapped extent: {snapped_extent}")
 
 # Buffer for data download to ensure complete features at edges
 # Optimized: reduced from 1° to 0.2° (80% reduction in download area)
@@ -186,78 +388,70 @@ def download_source_data():
     # print(f"QuadKeys: {quadkeys[:10]}{'...' if len(quadkeys) > 10 else ''}")
     
     # Apply QuadKey filtering to S3 URLs in the SQL
-    # Temporarily disable QuadKey optimization
-    # sql_content = optimize_sql_with_quadkeys(sql_content, quadkeys)
+    if QUADKEY_PARTITIONED:
+        sql_content = optimize_sql_with_quadkeys(sql_content, quadkeys)
 
-    # Split the SQL content into sections based on '-- breakpoint'
-    sql_sections = sql_content.split('-- breakpoint')
+    # Split the SQL content into sections based on '-- breakpoint', stripping
+    # each once and describing it up front so the loops below just read the plan
+    sql_sections = (section.strip() for section in sql_content.split('-- breakpoint'))
+    sections = [
+        (i, section, get_db_url(section)) for i, section in enumerate(sql_sections)
+        if section and not section.startswith('SET extent_')  # Skip empty sections and SET commands
+    ]
 
-    # Connect to DuckDB
-    conn = duckdb.connect()
+    # The bbox.xmin/xmax/ymin/ymax predicates are what let DuckDB skip row
+    # groups using the Parquet min/max statistics; without them a section
+    # scans the whole theme
+    for i, section, _ in sections:
+        if 'read_parquet(' in section and 'bbox.' not in section:
+            print(f"WARNING: Section {i + 1} reads Parquet without a bbox filter and will scan the full dataset")
 
     # Create a progress bar for the overall process
-    with tqdm(total=len([s for s in sql_sections if s.strip() and not s.strip().startswith('SET extent_')]), 
-              desc="Overall progress", unit="section", position=0, leave=True) as pbar:
+    with tqdm(total=len(sections), desc="Overall progress", unit="section", position=0, leave=True) as pbar:
         
-        # Execute each section
-        for i, section in enumerate(sql_sections):
-            section = section.strip()
-            if section and not section.startswith('SET extent_'):  # Skip empty sections and SET commands
-                # Extract URL and data type from the section
-                url_info = get_db_url(section)
-                if url_info:
-                    desc = f"Section {i + 1}: {url_info['description']}"
-                    tqdm.write(f"Executing {desc}")
-                    tqdm.write(f"  -> Querying: {url_info['url']}")
-                    tqdm.write(f"  -> Output: {url_info['output_file']}")
-                else:
-                    desc = f"Section {i + 1}"
-                    tqdm.write(f"Executing {desc}...")
-                
+        # Describe each section as it is queued
+        for i, section, url_info in sections:
+            if url_info:
+                tqdm.write(f"Queueing Section {i + 1}: {url_info['description']}")
+                tqdm.write(f"  -> Querying: {url_info['url']}")
+                tqdm.write(f"  -> Output: {url_info['output_file']}")
+            else:
+                tqdm.write(f"Queueing Section {i + 1}...")
+
+        conn = get_connection()
+        
+        # Sections without a COPY (e.g. the template's INSTALL/LOAD block) are
+        # setup that later sections may depend on, so run them first, in file
+        # order, as a single batch on one cursor
+        setup_sections = [(i, section) for i, section, _ in sections if 'COPY' not in section]
+        copy_sections = [(i, section) for i, section, _ in sections if 'COPY' in section]
+        if setup_sections:
+            setup_sql = "\n".join(section for _, section in setup_sections)
+            try:
+                run_sql_section(conn, setup_sql)
+                tqdm.write(f"  SUCCESS: Setup sections {', '.join(str(i + 1) for i, _ in setup_sections)} executed successfully.")
+            except Exception as e:
+                # The COPY sections can't be trusted to run without their
+                # setup, so don't start any of them
+                tqdm.write(f"  ERROR: Error executing setup sections: {e}")
+                tqdm.write(f"  Section content: {setup_sql[:200]}...")
+                tqdm.write(f"  Skipping {len(copy_sections)} COPY sections.")
+                pbar.update(len(copy_sections))
+                copy_sections = []
+            pbar.update(len(setup_sections))
+        
+        # Each COPY section reads a different Overture theme/type and spends
+        # most of its time waiting on S3/Azure, so run them concurrently on
+        # cursors of the shared connection
+        with ThreadPoolExecutor(max_workers=max(1, min(DOWNLOAD_WORKERS, len(copy_sections)))) as executor:
+            futures = {
+                executor.submit(run_sql_section, conn, section): (i, section)
+                for i, section in copy_sections
+            }
+            for future in as_completed(futures):
+                i, section = futures[future]
                 try:
-                    # Create a callback for progress updates during query execution
-                    class ProgressTracker:
-                        def __init__(self):
-                            self.progress_bar = None
-                            self.last_progress = 0
-                            self.current_step = 0
-                            self.total_steps = 100  # Estimate
-                        
-                        def progress(self, current, total=None):
-                            if total is not None and total > 0:
-                                self.total_steps = total
-                            
-                            # Initialize progress bar if not already done
-                            if self.progress_bar is None:
-                                self.progress_bar = tqdm(
-                                    total=self.total_steps, 
-                                    desc=f"  {desc}", 
-                                    unit="op", 
-                                    position=1, 
-                                    leave=False
-                                )
-                            
-                            # Update progress bar only for significant changes
-                            if current > self.last_progress:
-                                self.progress_bar.update(current - self.last_progress)
-                                self.last_progress = current
-                            
-                            # Complete the progress bar when done
-                            if current >= self.total_steps:
-                                if self.progress_bar:
-                                    self.progress_bar.close()
-                                    self.progress_bar = None
-                    
-                    # Create a tracker for this query
-                    tracker = ProgressTracker()
-                    
-                    # Execute the query
-                    conn.execute(section)
-                    
-                    # Make sure progress bar is closed
-                    if tracker.progress_bar:
-                        tracker.progress_bar.close()
-                    
+                    future.result()
                     tqdm.write(f"  SUCCESS: Section {i + 1} executed successfully.")
                 except Exception as e:
                     tqdm.write(f"  ERROR: Error executing section {i + 1}: {e}")
@@ -266,12 +460,43 @@ def download_source_data():
                 # Update the main progress bar
                 pbar.update(1)
 
-    # Close the connection
-    conn.close()
     tqdm.write("=== SOURCE DATA DOWNLOAD COMPLETE ===\n")
 
+@functools.lru_cache(maxsize=1)
+def get_connection():
+    """Return the DuckDB connection shared by every download in this process
+    
+    Extensions are loaded and settings applied once, and the caches stay warm
+    when download_source_data is called again, e.g. from a notebook. DuckDB
+    is imported here, so importing this module for the tiling helpers alone
+    doesn't load it.
+    """
+    import duckdb
+    
+    conn = duckdb.connect()
+    conn.execute(SECTION_SETUP_SQL)
+    atexit.register(conn.close)
+    return conn
+
+def run_sql_section(conn, section):
+    """Execute one SQL section on its own cursor of the shared connection
+    
+    A DuckDB connection can't be used from several threads at once, but its
+    cursors can, and they share the parent's database and caches.
+    """
+    cursor = conn.cursor()
+    try:
+        cursor.execute(SECTION_SETUP_SQL)
+        cursor.execute(section)
+    finally:
+        cursor.close()
+
 def process_to_tiles(filter_pattern=None):
-    """Process GeoJSON/GeoJSONSeq files into individual zoom-level PMTiles"""
+    """Process GeoJSON/GeoJSONSeq files into individual zoom-level PMTiles
+    
+    filter_pattern is a glob, or a list of globs, matched against file names;
+    a file is processed if it matches any of them.
+    """
     print("=== PROCESSING TO TILES ===")
     
     # Ensure directories exist
@@ -279,21 +504,24 @@ def process_to_tiles(filter_pattern=None):
     OVERTURE_DATA_DIR.mkdir(parents=True, exist_ok=True)
     TILE_DIR.mkdir(parents=True, exist_ok=True)
     
-    # Find all GeoJSON/GeoJSONSeq files in both data directories
-    geojson_files = []
-    
-    # Search in both data directories
+    # Index the GeoJSON/GeoJSONSeq files in both data directories by name,
+    # listing each directory once and only building Paths for the matches
+    files_by_name = {}
     for data_dir in [DATA_DIR, OVERTURE_DATA_DIR]:
-        if data_dir.exists():
-            found_files = [
-                f for f in data_dir.iterdir()
-                if (f.suffix in ['.geojson', '.geojsonseq']) and not f.name.endswith('.pmtiles')
-            ]
-            geojson_files.extend(found_files)
-    
-    # Apply filter if provided
+        with os.scandir(data_dir) as entries:
+            for entry in entries:
+                if os.path.splitext(entry.name)[1] in GEOJSON_SUFFIXES and entry.is_file():
+                    files_by_name.setdefault(entry.name, []).append(data_dir / entry.name)
+    
+    # Apply filter if provided, matching against the names alone. Several
+    # patterns are joined into one regex so each name is matched once
     if filter_pattern:
-        geojson_files = [f for f in geojson_files if fnmatch.fnmatch(f.name, filter_pattern)]
+        patterns = [filter_pattern] if isinstance(filter_pattern, str) else filter_pattern
+        filter_regex = re.compile('|'.join(fnmatch.translate(pattern) for pattern in patterns))
+        names = [name for name in files_by_name if filter_regex.match(name)]
+    else:
+        names = files_by_name
+    geojson_files = [f for name in names for f in files_by_name[name]]
     
     if not geojson_files:
         print("No GeoJSON/GeoJSONSeq files found. Run download_source_data() first.")
@@ -303,32 +531,51 @@ def process_to_tiles(filter_pattern=None):
     for f in geojson_files:
         print(f"  - {f.name}")
     
-    # Process each file individually
-    for geojson_file in geojson_files:
-        if not geojson_file.exists():
-            print(f"Warning: {geojson_file} does not exist, skipping...")
-            continue
-        
-        print(f"\n--- Processing {geojson_file.name} ---")
-        
-        # Determine layer name from filename (remove extensions)
-        layer_name = geojson_file.stem
-        if layer_name.endswith('.geojsonseq'):
-            layer_name = layer_name[:-12]  # Remove .geojsonseq
-        
-        # Create layer directory
-        layer_dir = TILE_DIR / layer_name
-        layer_dir.mkdir(parents=True, exist_ok=True)
-        
-        # Special handling for buildings with multi-LOD
-        if 'building' in geojson_file.name:
-            create_building_tiles_individual(geojson_file, layer_dir, layer_name)
-        else:
-            # Process as individual zoom-level PMTiles
-            process_individual_layer(geojson_file, layer_dir, layer_name)
+    # Each file is tiled into its own layer directory, so the files are
+    # independent and can be handed to separate worker processes
+    workers = max(1, min(len(geojson_files), TILE_WORKERS))
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_tile_worker, initargs=(workers,)) as executor, \
+            tqdm(total=len(geojson_files), desc="Processing files", unit="file") as pbar:
+        futures = {executor.submit(process_layer_file, f): f for f in geojson_files}
+        for future in as_completed(futures):
+            geojson_file = futures[future]
+            try:
+                future.result()
+            except Exception as e:
+                tqdm.write(f"ERROR: Failed to process {geojson_file.name}: {e}")
+            pbar.update(1)
     
     print("=== TILE PROCESSING COMPLETE ===\n")
 
+def init_tile_worker(workers):
+    """Split the CPU cores between the tippecanoe processes run by each worker"""
+    concurrent_runs = workers * TIPPECANOE_RUNS_PER_FILE
+    os.environ['TIPPECANOE_MAX_THREADS'] = str(max(1, (os.cpu_count() or 1) // concurrent_runs))
+
+def process_layer_file(geojson_file):
+    """Tile one GeoJSON/GeoJSONSeq file into its layer directory"""
+    if not geojson_file.exists():
+        print(f"Warning: {geojson_file} does not exist, skipping...")
+        return
+    
+    print(f"\n--- Processing {geojson_file.name} ---")
+    
+    # Determine layer name from filename (remove extensions)
+    layer_name = geojson_file.stem
+    if layer_name.endswith('.geojsonseq'):
+        layer_name = layer_name[:-12]  # Remove .geojsonseq
+    
+    # Create layer directory
+    layer_dir = TILE_DIR / layer_name
+    layer_dir.mkdir(parents=True, exist_ok=True)
+    
+    # Special handling for buildings with multi-LOD
+    if 'building' in geojson_file.name:
+        create_building_tiles_individual(geojson_file, layer_dir, layer_name)
+    else:
+        # Process as individual zoom-level PMTiles
+        process_individual_layer(geojson_file, layer_dir, layer_name)
+
 def validate_geojson(file_path):
     """Validate and clean GeoJSON files"""
     # Skip validation for GeoJSONSeq files since they're not single JSON objects
@@ -360,56 +607,119 @@ def process_single_file(file_path):
         # Get optimized tippecanoe settings based on file type
         cmd = get_tippecanoe_command(file_path, tile_path, layer_name)
         
-        # Execute tippecanoe
-        subprocess.run(cmd, check=True)
+        # Execute tippecanoe, capturing stderr so a failure can report it
+        subprocess.run(cmd, check=True, capture_output=True, text=True)
         
         return {"success": True, "message": f"Tiles generated successfully"}
         
     except subprocess.CalledProcessError as e:
-        return {"success": False, "message": f"Tippecanoe error: {e.stderr.decode() if e.stderr else str(e)}"}
+        return {"success": False, "message": f"Tippecanoe error: {e.stderr if e.stderr else str(e)}"}
     except Exception as e:
         return {"success": False, "message": f"Error: {str(e)}"}
 
+def iter_geojson_features(f, chunk_size=65536):
+    """Yield the features of a GeoJSON FeatureCollection one at a time
+    
+    Reads the file in chunks and decodes each feature as soon as it is
+    complete, so callers that stop early never read or parse the rest.
+    """
+    decoder = json.JSONDecoder()
+    buf = ''
+    
+    # Skip ahead to the opening bracket of the features array
+    while True:
+        match = FEATURES_ARRAY_PATTERN.search(buf)
+        if match:
+            buf = buf[match.end():]
+            break
+        chunk = f.read(chunk_size)
+        if not chunk:
+            return
+        buf += chunk
+    
+    pos = 0
+    while True:
+        pos = FEATURE_SEPARATOR_PATTERN.match(buf, pos).end()
+        if pos == len(buf):
+            chunk = f.read(chunk_size)
+            if not chunk:
+                return
+            buf, pos = chunk, 0
+            continue
+        if buf[pos] == ']':
+            return
+        
+        try:
+            feature, end = decoder.raw_decode(buf, pos)
+        except json.JSONDecodeError:
+            # Feature is cut off by the end of the buffer; read at least as
+            # much again so a large feature costs linear rather than
+            # quadratic work
+            chunk = f.read(max(chunk_size, len(buf) - pos))
+            if not chunk:
+                raise
+            buf, pos = buf[pos:] + chunk, 0
+            continue
+        
+        yield feature
+        pos = end
+
+def sniff_geometry_types(file_path, max_samples):
+    """Collect the geometry types of the first max_samples features
+    
+    Scans the memory-mapped file with GEOMETRY_TYPE_PATTERN rather than
+    parsing JSON. Returns an empty set when nothing matches.
+    """
+    geometry_types = set()
+    with open(file_path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return geometry_types
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            for sample_count, match in enumerate(GEOMETRY_TYPE_PATTERN.finditer(mm)):
+                if sample_count >= max_samples:
+                    break
+                geometry_types.add(match.group(1).decode())
+    return geometry_types
+
 def detect_geometry_type(file_path):
     """Detect the primary geometry type from a GeoJSON or GeoJSONSeq file
     
     Returns: 'Point', 'LineString', 'Polygon', 'MultiPoint', 'MultiLineString', 'MultiPolygon', or 'Mixed'
     """
     try:
-        geometry_types = set()
-        sample_count = 0
         max_samples = 100  # Sample first 100 features for performance
+        geometry_types = sniff_geometry_types(file_path, max_samples)
         
-        with open(file_path, 'r') as f:
-            # First, try to detect if this is actually a line-delimited JSON file
-            # even if it has a .geojson extension
-            first_line = f.readline().strip()
-            f.seek(0)  # Reset file pointer
+        # Fall back to decoding the features when the scan finds nothing,
+        # e.g. for unusually formatted files
+        if not geometry_types:
+            sample_count = 0
+            with open(file_path, 'r') as f:
+                # First, try to detect if this is actually a line-delimited JSON file
+                # even if it has a .geojson extension
+                is_line_delimited = file_path.suffix == '.geojsonseq'
+                if not is_line_delimited:
+                    # Check if the first two lines are complete JSON features. The
+                    # reads are capped so a regular GeoJSON written on a single
+                    # line isn't read whole; a cut-off line just fails to parse
+                    try:
+                        first_obj = json.loads(f.readline(SNIFF_LINE_LIMIT))
+                        second_obj = json.loads(f.readline(SNIFF_LINE_LIMIT))
+                        is_line_delimited = all(
+                            isinstance(obj, dict) and obj.get('type') == 'Feature'
+                            for obj in (first_obj, second_obj)
+                        )
+                    except json.JSONDecodeError:
+                        pass
+                    f.seek(0)  # Reset file pointer
             
-            # Check if first line is a complete JSON object (feature)
-            is_line_delimited = False
-            try:
-                first_obj = json.loads(first_line)
-                if isinstance(first_obj, dict) and first_obj.get('type') == 'Feature':
-                    # Check if there's more content after the first line
-                    f.readline()  # Skip first line
-                    second_line = f.readline().strip()
-                    if second_line:
-                        try:
-                            second_obj = json.loads(second_line)
-                            if isinstance(second_obj, dict) and second_obj.get('type') == 'Feature':
-                                is_line_delimited = True
-                        except json.JSONDecodeError:
-                            pass
-                f.seek(0)  # Reset file pointer again
-            except json.JSONDecodeError:
-                pass
-            
-            if file_path.suffix == '.geojsonseq' or is_line_delimited:
-                # Handle GeoJSONSeq files or line-delimited JSON files
-                for line in f:
-                    line = line.strip()
-                    if line and sample_count < max_samples:
+                if is_line_delimited:
+                    # Handle GeoJSONSeq files or line-delimited JSON files, stopping
+                    # once enough features have been sampled
+                    for line in f:
+                        line = line.strip()
+                        if not line:
+                            continue
                         try:
                             feature = json.loads(line)
                             if 'geometry' in feature and feature['geometry'] and 'type' in feature['geometry']:
@@ -418,21 +728,27 @@ def detect_geometry_type(file_path):
                                 sample_count += 1
                         except json.JSONDecodeError:
                             continue
-            else:
-                # Handle regular GeoJSON files
-                try:
-                    data = json.load(f)
-                    if 'features' in data:
-                        for feature in data['features'][:max_samples]:
+                        if sample_count >= max_samples:
+                            break
+                else:
+                    # Handle regular GeoJSON files, decoding only the sampled features
+                    try:
+                        for feature in iter_geojson_features(f):
                             if 'geometry' in feature and feature['geometry'] and 'type' in feature['geometry']:
                                 geom_type = feature['geometry']['type']
                                 geometry_types.add(geom_type)
                                 sample_count += 1
-                    elif 'geometry' in data and data['geometry'] and 'type' in data['geometry']:
-                        # Single feature GeoJSON
-                        geometry_types.add(data['geometry']['type'])
-                except json.JSONDecodeError:
-                    return 'Unknown'
+                            if sample_count >= max_samples:
+                                break
+                    
+                        if not geometry_types:
+                            # No features array; may be a single feature GeoJSON
+                            f.seek(0)
+                            data = json.load(f)
+                            if 'geometry' in data and data['geometry'] and 'type' in data['geometry']:
+                                geometry_types.add(data['geometry']['type'])
+                    except json.JSONDecodeError:
+                        return 'Unknown'
         
         # Normalize geometry types to base types
         normalized_types = set()
@@ -458,6 +774,234 @@ def detect_geometry_type(file_path):
         print(f"Warning: Could not detect geometry type for {file_path}: {e}")
         return 'Unknown'
 
+@functools.lru_cache(maxsize=256)
+def detect_geometry_type_cached(file_path, mtime):
+    """detect_geometry_type, reusing the result until the file's mtime changes
+    
+    The settings cache is also keyed on the layer name, so without this the
+    same file would be sampled again for every layer name it is tiled under.
+    Results are also kept in GEOMETRY_CACHE_PATH, keyed on the file's path,
+    mtime and size, so unchanged files aren't sampled again on later runs.
+    """
+    stat = file_path.stat()
+    key = f"{file_path}:{stat.st_mtime_ns}:{stat.st_size}"
+    cache = load_geometry_cache()
+    entry = cache.get(key)
+    if entry is not None:
+        return entry['type']
+    
+    geometry_type = detect_geometry_type(file_path)
+    if geometry_type != 'Unknown':
+        cache[key] = {'type': geometry_type, 'detected': time.time()}
+        save_geometry_cache(cache)
+    return geometry_type
+
+def read_geometry_cache():
+    """Read the on-disk geometry type cache, dropping expired entries"""
+    try:
+        with open(GEOMETRY_CACHE_PATH, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    cutoff = time.time() - GEOMETRY_CACHE_MAX_AGE
+    return {key: entry for key, entry in cache.items() if entry.get('detected', 0) >= cutoff}
+
+@functools.lru_cache(maxsize=1)
+def load_geometry_cache():
+    """Return this process's copy of the geometry type cache, read on first use"""
+    return read_geometry_cache()
+
+def save_geometry_cache(cache):
+    """Write the geometry type cache, merging entries saved by other workers
+    
+    Written to a temporary file that then replaces the cache, so a reader
+    never sees a partial file.
+    """
+    try:
+        cache.update({key: entry for key, entry in read_geometry_cache().items() if key not in cache})
+        TILE_DIR.mkdir(parents=True, exist_ok=True)
+        tmp_path = GEOMETRY_CACHE_PATH.with_name(f"{GEOMETRY_CACHE_PATH.name}.{os.getpid()}.tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(cache, f, separators=(',', ':'))
+        os.replace(tmp_path, GEOMETRY_CACHE_PATH)
+    except OSError as e:
+        print(f"Warning: Could not save geometry type cache: {e}")
+
+# Layer-specific tippecanoe settings returned by get_layer_tippecanoe_settings,
+# then geometry-based defaults for files whose layer type isn't recognized
+
+# Optimized for water polygons with enhanced detail at zoom 13+
+WATER_SETTINGS = (
+    # '--simplification=2',        # Reduced for better coastline detail (better than default)
+    # '--low-detail=12',           # Earlier detail start
+    # '--full-detail=13',        
+    '--no-tiny-polygon-reduction',
+    # '--no-feature-limit',
+    '--extend-zooms-if-still-dropping',
+    '--maximum-tile-bytes=2097152',  # 2MB for water features (override base)
+    '--maximum-zoom=15',         # Extended to match base polygons
+    # '--gamma=0.9',               # Less aggressive for water bodies
+)
+
+# Settlement extents with special preserved settings
+SETTLEMENT_EXTENTS_SETTINGS = (
+    '--simplification=5',
+    '--drop-rate=0.25',
+    '--low-detail=11',
+    '--full-detail=14',
+    '--coalesce-smallest-as-needed',
+    '--gamma=0.8',
+    '--maximum-zoom=13',
+    '--minimum-zoom=6',
+    '--cluster-distance=2',
+    '--minimum-detail=8'
+)
+
+# Optimized for road lines
+ROADS_SETTINGS = (
+    '--no-line-simplification',  # Unique to roads
+    '--buffer=16',               # Override base buffer for roads (better quality)
+    '--drop-rate=0.05',          # Very conservative for roads
+    '--drop-smallest',
+    '--simplification=5',
+    '--minimum-zoom=7',
+    '--extend-zooms-if-still-dropping',
+    '--coalesce-smallest-as-needed',
+    # '--low-detail=11',
+    '--full-detail=13',
+    '--minimum-detail=10'
+)
+
+# Optimized for point features (minimal settings needed)
+PLACES_SETTINGS = (
+    '--cluster-distance=10',     # Reduced for better point preservation
+    '--drop-rate=0.0',          # NO dropping for point features
+    '--no-feature-limit',       # Ensure all points are preserved
+    '--extend-zooms-if-still-dropping',  # Extend zooms to prevent dropping
+    '--maximum-zoom=16',        # Ensure points visible at highest zooms
+)
+
+# Optimized for base polygon layers (land_use, land_cover, etc.)
+BASE_POLYGONS_SETTINGS = (
+    '--extend-zooms-if-still-dropping-maximum=16',
+    '--drop-rate=0.1',
+    '--coalesce-densest-as-needed',
+    # '--no-tiny-polygon-reduction',
+    '--minimum-zoom=8',
+    '--maximum-zoom=15',
+)
+
+# Optimized for point features
+POINT_DEFAULTS = (
+    '--cluster-distance=35',     # Point clustering for better display
+    '--drop-rate=0.05',         # Very conservative for points
+    '--low-detail=8',           # Earlier detail for points visibility
+    '--full-detail=11',         # Earlier full detail for points
+    '--coalesce-smallest-as-needed',
+    '--extend-zooms-if-still-dropping',
+    '--gamma=0.3',              # Less aggressive for point density
+    '--maximum-zoom=15',
+    '--minimum-zoom=6',         # Points visible at lower zooms
+    '--simplification=1',       # Minimal simplification for points
+)
+
+# Optimized for line features (roads, infrastructure, etc.)
+LINESTRING_DEFAULTS = (
+    '--no-line-simplification', # Preserve line geometry
+    '--drop-rate=0.08',         # Conservative for linear features
+    '--low-detail=9',           # Good detail preservation
+    '--full-detail=12',         
+    '--coalesce-smallest-as-needed',
+    '--extend-zooms-if-still-dropping',
+    '--gamma=0.4',              # Moderate density reduction
+    '--maximum-zoom=15',
+    '--minimum-zoom=7',         # Lines visible at medium zooms
+    '--simplification=3',       # Moderate simplification for lines
+    '--buffer=12',              # Higher buffer for line features
+)
+
+# Optimized for polygon features (default polygon settings)
+POLYGON_DEFAULTS = (
+    '--simplification=5',        # Moderate simplification for polygons
+    '--drop-rate=0.1',          # Conservative dropping
+    '--low-detail=10',          # Standard detail start
+    '--full-detail=13',         # Good full detail
+    '--coalesce-smallest-as-needed',
+    '--extend-zooms-if-still-dropping',
+    '--gamma=0.5',              # Balanced density reduction
+    '--maximum-zoom=15',
+    '--minimum-zoom=8',         # Polygons at higher zooms
+    # '--no-tiny-polygon-reduction',  # Preserve small polygons
+)
+
+# Mixed or Unknown geometry types - use conservative polygon defaults
+MIXED_DEFAULTS = (
+    '--simplification=19',        # Conservative simplification
+    '--drop-rate=0.08',         # Very conservative dropping
+    '--low-detail=9',           # Early detail preservation
+    '--full-detail=15',         
+    '--coalesce-smallest-as-needed',
+    '--extend-zooms-if-still-dropping',
+    # '--gamma=0.4',              # Moderate density reduction
+    '--maximum-zoom=15',
+    '--minimum-zoom=7',
+)
+
+# Settings for each recognized layer type
+LAYER_TYPE_SETTINGS = {
+    'water': WATER_SETTINGS,
+    'settlement-extents': SETTLEMENT_EXTENTS_SETTINGS,
+    'roads': ROADS_SETTINGS,
+    'places': PLACES_SETTINGS,
+    'base-polygons': BASE_POLYGONS_SETTINGS,
+}
+
+# Defaults for each detected geometry type; anything else gets MIXED_DEFAULTS
+GEOMETRY_TYPE_DEFAULTS = {
+    'Point': POINT_DEFAULTS,
+    'LineString': LINESTRING_DEFAULTS,
+    'Polygon': POLYGON_DEFAULTS,
+}
+
+# Layer types for layer names that identify them exactly
+LAYER_NAME_TYPES = {
+    'water': 'water',
+    'settlement-extents': 'settlement-extents',
+    'settlementextents': 'settlement-extents',
+    'roads': 'roads',
+    'places': 'places',
+    'placenames': 'places',
+    'land_use': 'base-polygons',
+    'land_cover': 'base-polygons',
+    'land_residential': 'base-polygons',
+    'infrastructure': 'base-polygons',
+}
+
+# Filename keywords for each layer type, as one pattern searched in a single
+# pass. The lookahead reports keywords starting at every position, even
+# overlapping ones, and the groups are in priority order so land* patterns
+# win. 'land' also covers land_use, land_cover and land_residential.
+FILENAME_LAYER_PATTERN = re.compile(
+    r"(?=(?P<base_polygons>land|infrastructure)"
+    r"|(?P<water>water)"
+    r"|(?P<settlement_extents>extents|settlement)"
+    r"|(?P<roads>roads)"
+    r"|(?P<places>places|placenames))"
+)
+
+@functools.lru_cache(maxsize=1024)
+def resolve_data_path(filename):
+    """Find a data file by name in the data directories, or None
+    
+    Cached so repeat lookups skip the stat() calls. Lookups happen while
+    tiling, after the download has written its files.
+    """
+    for data_dir in [DATA_DIR, OVERTURE_DATA_DIR]:
+        potential_path = data_dir / filename
+        if potential_path.exists():
+            return potential_path
+    return None
+
 def get_layer_tippecanoe_settings(layer_name, filename_or_path=None):
     """Get layer-specific tippecanoe settings based on layer name and filename/path
     
@@ -471,11 +1015,10 @@ def get_layer_tippecanoe_settings(layer_name, filename_or_path=None):
     - --coalesce-densest-as-needed (most layers)
     - --drop-fraction-as-needed (most layers)
     
-    This function now returns only layer-specific options.
+    This function now returns only layer-specific options. Results are cached
+    per layer name, file and modification time, so repeat calls for the same
+    file skip geometry detection.
     """
-    import time
-    start_time = time.time()
-    
     # Handle both Path objects and filename strings
     if filename_or_path:
         if hasattr(filename_or_path, 'name'):  # Path object
@@ -483,60 +1026,43 @@ def get_layer_tippecanoe_settings(layer_name, filename_or_path=None):
             file_path = filename_or_path
         else:  # String filename
             filename = filename_or_path
-            file_path = None
-            # Try to find the file in data directories
-            for data_dir in [DATA_DIR, OVERTURE_DATA_DIR]:
-                potential_path = data_dir / filename
-                if potential_path.exists():
-                    file_path = potential_path
-                    break
+            file_path = resolve_data_path(filename)
     else:
         filename = None
         file_path = None
     
+    # The modification time is part of the cache key so a file that has been
+    # downloaded again is detected again. A single stat() both checks that the
+    # file exists and reads its mtime.
+    mtime = 0
+    if file_path:
+        try:
+            mtime = file_path.stat().st_mtime
+        except OSError:
+            pass
+    return list(select_layer_tippecanoe_settings(layer_name, filename, file_path, mtime))
+
+@functools.lru_cache(maxsize=512)
+def select_layer_tippecanoe_settings(layer_name, filename, file_path, mtime):
+    """Select the settings for get_layer_tippecanoe_settings; mtime only keys the cache"""
+    if DEBUG:
+        start_time = time.perf_counter()
+    
     # Determine layer type from layer name or filename
     layer_type = None
     detection_method = None
     
     # Check layer name first for explicit layer type detection
     if layer_name:
-        layer_name_lower = layer_name.lower()
-        if layer_name_lower in ['water']:
-            layer_type = 'water'
-            detection_method = 'layer_name'
-        elif layer_name_lower in ['settlement-extents', 'settlementextents']:
-            layer_type = 'settlement-extents'
-            detection_method = 'layer_name'
-        elif layer_name_lower in ['roads']:
-            layer_type = 'roads'
-            detection_method = 'layer_name'
-        elif layer_name_lower in ['places', 'placenames']:
-            layer_type = 'places'
-            detection_method = 'layer_name'
-        elif layer_name_lower in ['land_use', 'land_cover', 'land_residential', 'infrastructure']:
-            layer_type = 'base-polygons'
+        layer_type = LAYER_NAME_TYPES.get(layer_name.lower())
+        if layer_type:
             detection_method = 'layer_name'
     
     # If layer type not determined from layer name, check filename
     if layer_type is None and filename:
-        filename_lower = filename.lower()
-        # Check for base-polygons first to give land* patterns priority
-        # Look for any land-related keywords or specific land layer patterns
-        land_keywords = ['land_use', 'land_cover', 'land_residential', 'infrastructure', 'land']
-        if any(keyword in filename_lower for keyword in land_keywords):
-            layer_type = 'base-polygons'
-            detection_method = 'filename_pattern'
-        elif 'water' in filename_lower:
-            layer_type = 'water'
-            detection_method = 'filename_pattern'
-        elif 'extents' in filename_lower or 'settlement' in filename_lower:
-            layer_type = 'settlement-extents'
-            detection_method = 'filename_pattern'
-        elif 'roads' in filename_lower:
-            layer_type = 'roads'
-            detection_method = 'filename_pattern'
-        elif 'places' in filename_lower or 'placenames' in filename_lower:
-            layer_type = 'places'
+        matched = {m.lastgroup for m in FILENAME_LAYER_PATTERN.finditer(filename.lower())}
+        if matched:
+            layer_type = min(matched, key=FILENAME_LAYER_PATTERN.groupindex.get).replace('_', '-')
             detection_method = 'filename_pattern'
     
     # Track whether geometry detection was needed
@@ -544,150 +1070,26 @@ def get_layer_tippecanoe_settings(layer_name, filename_or_path=None):
     geometry_type = None
     
     # Return layer-specific tippecanoe flags (common options moved to base command)
-    if layer_type == 'water':
-        # Optimized for water polygons with enhanced detail at zoom 13+
-        settings = [
-            # '--simplification=2',        # Reduced for better coastline detail (better than default)
-            # '--low-detail=12',           # Earlier detail start
-            # '--full-detail=13',        
-            '--no-tiny-polygon-reduction',
-            # '--no-feature-limit',
-            '--extend-zooms-if-still-dropping',
-            '--maximum-tile-bytes=2097152',  # 2MB for water features (override base)
-            '--maximum-zoom=15',         # Extended to match base polygons
-            # '--gamma=0.9',               # Less aggressive for water bodies
-        ]
+    settings = LAYER_TYPE_SETTINGS.get(layer_type)
     
-    elif layer_type == 'settlement-extents':
-        # Settlement extents with special preserved settings
-        settings = [
-            '--simplification=5',
-            '--drop-rate=0.25',
-            '--low-detail=11',
-            '--full-detail=14',
-            '--coalesce-smallest-as-needed',
-            '--gamma=0.8',
-            '--maximum-zoom=13',
-            '--minimum-zoom=6',
-            '--cluster-distance=2',
-            '--minimum-detail=8'
-        ]
-    
-    elif layer_type == 'roads':
-        # Optimized for road lines
-        settings = [
-            '--no-line-simplification',  # Unique to roads
-            '--buffer=16',               # Override base buffer for roads (better quality)
-            '--drop-rate=0.05',          # Very conservative for roads
-            '--drop-smallest',
-            '--simplification=5',
-            '--minimum-zoom=7',
-            '--extend-zooms-if-still-dropping',
-            '--coalesce-smallest-as-needed',
-            # '--low-detail=11',
-            '--full-detail=13',
-            '--minimum-detail=10'
-        ]
-    
-    elif layer_type == 'places':
-        # Optimized for point features (minimal settings needed)
-        settings = [
-            '--cluster-distance=10',     # Reduced for better point preservation
-            '--drop-rate=0.0',          # NO dropping for point features
-            '--no-feature-limit',       # Ensure all points are preserved
-            '--extend-zooms-if-still-dropping',  # Extend zooms to prevent dropping
-            '--maximum-zoom=16',        # Ensure points visible at highest zooms
-        ]
-    
-    elif layer_type == 'base-polygons':
-        # Optimized for base polygon layers (land_use, land_cover, etc.)
-        settings = [
-            '--extend-zooms-if-still-dropping-maximum=16',
-            '--drop-rate=0.1',
-            '--coalesce-densest-as-needed',
-            # '--no-tiny-polygon-reduction',
-            '--minimum-zoom=8',
-            '--maximum-zoom=15',
-        ]
-    
-    else:
+    if settings is None:
         # Default settings based on geometry type detection
         detection_method = 'geometry_detection'
         if file_path and file_path.exists():
-            geom_start_time = time.time()
-            geometry_type = detect_geometry_type(file_path)
-            geometry_detection_time = time.time() - geom_start_time
+            geom_start_time = time.perf_counter()
+            geometry_type = detect_geometry_type_cached(file_path, mtime)
+            geometry_detection_time = time.perf_counter() - geom_start_time
             print(f"  Detected geometry type: {geometry_type} for {filename} ({geometry_detection_time:.3f}s)")
         else:
             geometry_type = 'Unknown'
             print(f"  Could not detect geometry type for {filename}, using polygon defaults")
         
-        # Return geometry-specific settings
-        if geometry_type == 'Point':
-            # Optimized for point features
-            settings = [
-                '--cluster-distance=35',     # Point clustering for better display
-                '--drop-rate=0.05',         # Very conservative for points
-                '--low-detail=8',           # Earlier detail for points visibility
-                '--full-detail=11',         # Earlier full detail for points
-                '--coalesce-smallest-as-needed',
-                '--extend-zooms-if-still-dropping',
-                '--gamma=0.3',              # Less aggressive for point density
-                '--maximum-zoom=15',
-                '--minimum-zoom=6',         # Points visible at lower zooms
-                '--simplification=1',       # Minimal simplification for points
-            ]
-        
-        elif geometry_type == 'LineString':
-            # Optimized for line features (roads, infrastructure, etc.)
-            settings = [
-                '--no-line-simplification', # Preserve line geometry
-                '--drop-rate=0.08',         # Conservative for linear features
-                '--low-detail=9',           # Good detail preservation
-                '--full-detail=12',         
-                '--coalesce-smallest-as-needed',
-                '--extend-zooms-if-still-dropping',
-                '--gamma=0.4',              # Moderate density reduction
-                '--maximum-zoom=15',
-                '--minimum-zoom=7',         # Lines visible at medium zooms
-                '--simplification=3',       # Moderate simplification for lines
-                '--buffer=12',              # Higher buffer for line features
-            ]
-        
-        elif geometry_type == 'Polygon':
-            # Optimized for polygon features (default polygon settings)
-            settings = [
-                '--simplification=5',        # Moderate simplification for polygons
-                '--drop-rate=0.1',          # Conservative dropping
-                '--low-detail=10',          # Standard detail start
-                '--full-detail=13',         # Good full detail
-                '--coalesce-smallest-as-needed',
-                '--extend-zooms-if-still-dropping',
-                '--gamma=0.5',              # Balanced density reduction
-                '--maximum-zoom=15',
-                '--minimum-zoom=8',         # Polygons at higher zooms
-                # '--no-tiny-polygon-reduction',  # Preserve small polygons
-            ]
-        
-        else:
-            # Mixed or Unknown geometry types - use conservative polygon defaults
-            settings = [
-                '--simplification=19',        # Conservative simplification
-                '--drop-rate=0.08',         # Very conservative dropping
-                '--low-detail=9',           # Early detail preservation
-                '--full-detail=15',         
-                '--coalesce-smallest-as-needed',
-                '--extend-zooms-if-still-dropping',
-                # '--gamma=0.4',              # Moderate density reduction
-                '--maximum-zoom=15',
-                '--minimum-zoom=7',
-            ]
-    
-    # Log performance and decision metrics
-    total_time = time.time() - start_time
-    
-    # Only log detailed metrics if debugging is enabled (check for debug flag or verbose mode)
-    if hasattr(sys, 'argv') and ('--debug' in sys.argv or '--verbose' in sys.argv):
+        # Mixed or Unknown geometry types use conservative polygon defaults
+        settings = GEOMETRY_TYPE_DEFAULTS.get(geometry_type, MIXED_DEFAULTS)
+    
+    # Only log performance and decision metrics if debugging is enabled
+    if DEBUG:
+        total_time = time.perf_counter() - start_time
         identifier = layer_name if layer_name else (filename if filename else 'unknown')
         print(f"  Settings selection for '{identifier}':")
         print(f"    Method: {detection_method}")
@@ -697,65 +1099,83 @@ def get_layer_tippecanoe_settings(layer_name, filename_or_path=None):
         print(f"    Geometry detection time: {geometry_detection_time:.3f}s")
         print(f"    Settings count: {len(settings)}")
     
+    return settings
+
+@functools.lru_cache(maxsize=256)
+def filename_settings_kind(filename):
+    """Classify a data file name as 'water', 'road' or 'default' for the command settings"""
+    filename = filename.lower()
+    if 'water' in filename:
+        return 'water'
+    if 'road' in filename:
+        return 'road'
+    return 'default'
+
+# Settings added by get_tippecanoe_command for each filename kind
+TIPPECANOE_COMMAND_SETTINGS = {
+    # Water features - preserve polygon topology
+    'water': (
+        '-zg',
+        '--detect-shared-borders',
+        '--no-tiny-polygon-reduction',
+        '--low-detail=13',
+        '--full-detail=15',
+        '--no-feature-limit',
+        '--buffer=64',
+        '--drop-fraction-as-needed',
+        '--preserve-input-order',
+        '--coalesce-densest-as-needed',
+        '--extend-zooms-if-still-dropping',
+        '--maximum-tile-bytes=1048576',
+    ),
+    # Roads - linear features
+    'road': (
+        '-z14',
+        '-Z11',
+        '--drop-rate=0.05',
+        '--drop-smallest',
+        '--simplification=10',
+        '--buffer=16',
+        '--extend-zooms-if-still-dropping',
+        '--maximum-tile-bytes=1048576',
+        '--coalesce-smallest-as-needed',
+        '--preserve-input-order',
+        '--minimum-detail=14',
+    ),
+    # Default for other polygon features (land, places, etc.)
+    'default': (
+        '-zg',
+        '--simplification=10',
+        '--low-detail=11',
+        '--full-detail=14',
+        '--drop-densest-as-needed',
+        '--detect-shared-borders',
+        '--maximum-tile-bytes=1048576',
+        '--buffer=16',
+        '--extend-zooms-if-still-dropping',
+    ),
+}
+
 def get_tippecanoe_command(input_path, tile_path, layer_name):
     """Get tippecanoe command based on file type - simplified approach"""
-    filename = Path(input_path).name.lower()
-    
     # Base command
     base_cmd = [
         'tippecanoe',
         '-fo', str(tile_path),
         '-l', layer_name,
-        '--clip-bounding-box', f"{extent_xmin},{extent_ymin},{extent_xmax},{extent_ymax}",
+        '--clip-bounding-box', clip_bounding_box,
         '-P',
         str(input_path)
     ]
     
     # Layer-specific settings based on filename patterns
-    if 'water' in filename:
-        # Water features - preserve polygon topology
-        return base_cmd + [
-            '-zg',
-            '--detect-shared-borders',
-            '--no-tiny-polygon-reduction',
-            '--low-detail=13',
-            '--full-detail=15',
-            '--no-feature-limit',
-            '--buffer=64',
-            '--drop-fraction-as-needed',
-            '--preserve-input-order',
-            '--coalesce-densest-as-needed',
-            '--extend-zooms-if-still-dropping',
-            '--maximum-tile-bytes=1048576'
-        ]
-    elif 'road' in filename:
-        # Roads - linear features
-        return base_cmd + [
-            '-z14',
-            '-Z11',
-            '--drop-rate=0.05',
-            '--drop-smallest',
-            '--simplification=10',
-            '--buffer=16',
-            '--extend-zooms-if-still-dropping',
-            '--maximum-tile-bytes=1048576',
-            '--coalesce-smallest-as-needed',
-            '--preserve-input-order',
-            '--minimum-detail=14'
-        ]
-    else:
-        # Default for other polygon features (land, places, etc.)
-        return base_cmd + [
-            '-zg',
-            '--simplification=10',
-            '--low-detail=11',
-            '--full-detail=14',
-            '--drop-densest-as-needed',
-            '--detect-shared-borders',
-            '--maximum-tile-bytes=1048576',
-            '--buffer=16',
-            '--extend-zooms-if-still-dropping'
-        ]
+    base_cmd.extend(TIPPECANOE_COMMAND_SETTINGS[filename_settings_kind(os.path.basename(input_path))])
+    
+    return base_cmd
+
+# Fields advertised in the TileJSON for generic and building vector layers
+LAYER_FIELDS = {"id": "String", "name": "String"}
+BUILDING_LAYER_FIELDS = {"id": "String", "name": "String", "height": "Number"}
 
 def create_tilejson():
     """Generate TileJSON for MapLibre integration - dynamically includes all available zoom-level PMTiles"""
@@ -771,72 +1191,72 @@ def create_tilejson():
         "vector_layers": []
     }
     
-    # Scan for available layer directories in the tiles directory
-    layer_directories = [d for d in TILE_DIR.iterdir() if d.is_dir()]
-    
-    # Also scan for any remaining PMTiles in the root tiles directory (from custom processing)
-    root_pmtiles = list(TILE_DIR.glob("*.pmtiles"))
+    # List the tiles directory once for both the layer directories and any
+    # remaining PMTiles in the root (from custom processing)
+    layer_directories = []
+    root_pmtiles = []
+    with os.scandir(TILE_DIR) as entries:
+        for entry in entries:
+            if entry.is_dir():
+                layer_directories.append(entry.name)
+            elif entry.name.endswith('.pmtiles'):
+                root_pmtiles.append(entry.name)
     
     # Process layer directories (new structure with zoom-level PMTiles)
-    for layer_dir in sorted(layer_directories):
-        layer_name = layer_dir.name
-        
-        # Check for zoom-level PMTiles in this layer directory
-        zoom_pmtiles = list(layer_dir.glob(f"{layer_name}_z*.pmtiles"))
+    for layer_name in sorted(layer_directories):
+        # List each layer directory once, sorting its PMTiles into zoom-level
+        # files and building LOD files (grouped by LOD type) in a single pass
+        zoom_pattern = re.compile(rf"{re.escape(layer_name)}_z.*\.pmtiles")
+        lod_pattern = re.compile(rf"{re.escape(layer_name)}_(?:.*_)?([^_]+)_lod_z.*\.pmtiles")
+        zoom_pmtiles = []
+        lod_groups = {}
+        with os.scandir(TILE_DIR / layer_name) as entries:
+            for pmtiles_name in sorted(entry.name for entry in entries):
+                if zoom_pattern.fullmatch(pmtiles_name):
+                    zoom_pmtiles.append(pmtiles_name)
+                # e.g. "buildings_low_lod_z10.pmtiles" -> "low"
+                match = lod_pattern.fullmatch(pmtiles_name)
+                if match:
+                    lod_groups.setdefault(match.group(1), []).append(pmtiles_name)
         
         if zoom_pmtiles:
             # This is a layer directory with zoom-level PMTiles
             print(f"TILEJSON: Found layer directory: {layer_name} with {len(zoom_pmtiles)} zoom-level PMTiles")
             
             # Add each zoom-level PMTiles as a separate tile source
-            for pmtiles_file in sorted(zoom_pmtiles):
-                tile_url = f"pmtiles://tiles/{layer_name}/{pmtiles_file.name}"
+            for pmtiles_name in zoom_pmtiles:
+                tile_url = f"pmtiles://tiles/{layer_name}/{pmtiles_name}"
                 tilejson["tiles"].append(tile_url)
             
             # Add vector layer info for this layer
             vector_layer = {
                 "id": layer_name,
                 "description": f"Layer: {layer_name} (Individual zoom-level PMTiles)",
-                "fields": {"id": "String", "name": "String"}  # Generic fields
+                "fields": LAYER_FIELDS
             }
             tilejson["vector_layers"].append(vector_layer)
         
         # Check for building LOD PMTiles
-        lod_pmtiles = list(layer_dir.glob(f"{layer_name}_*_lod_z*.pmtiles"))
-        
-        if lod_pmtiles:
-            print(f"TILEJSON: Found building layer directory: {layer_name} with {len(lod_pmtiles)} LOD PMTiles")
-            
-            # Group by LOD type
-            lod_groups = {}
-            for pmtiles_file in lod_pmtiles:
-                # Extract LOD type from filename (e.g., "buildings_low_lod_z10.pmtiles" -> "low")
-                parts = pmtiles_file.stem.split('_')
-                if len(parts) >= 3 and 'lod' in parts:
-                    lod_idx = parts.index('lod')
-                    if lod_idx > 0:
-                        lod_type = parts[lod_idx - 1]
-                        if lod_type not in lod_groups:
-                            lod_groups[lod_type] = []
-                        lod_groups[lod_type].append(pmtiles_file)
+        if lod_groups:
+            lod_count = sum(len(pmtiles_names) for pmtiles_names in lod_groups.values())
+            print(f"TILEJSON: Found building layer directory: {layer_name} with {lod_count} LOD PMTiles")
             
             # Add PMTiles for each LOD group
-            for lod_type, pmtiles_files in lod_groups.items():
-                for pmtiles_file in sorted(pmtiles_files):
-                    tile_url = f"pmtiles://tiles/{layer_name}/{pmtiles_file.name}"
+            for lod_type, pmtiles_names in lod_groups.items():
+                for pmtiles_name in pmtiles_names:
+                    tile_url = f"pmtiles://tiles/{layer_name}/{pmtiles_name}"
                     tilejson["tiles"].append(tile_url)
                 
                 # Add vector layer info for each LOD
                 vector_layer = {
                     "id": f"{layer_name}_{lod_type}_lod",
                     "description": f"Layer: {layer_name} {lod_type.upper()} LOD (Individual zoom-level PMTiles)",
-                    "fields": {"id": "String", "name": "String", "height": "Number"}
+                    "fields": BUILDING_LAYER_FIELDS
                 }
                 tilejson["vector_layers"].append(vector_layer)
     
     # Process any remaining PMTiles in root directory (from custom processing)
-    for tile_file in sorted(root_pmtiles):
-        tile_name = tile_file.name
+    for tile_name in sorted(root_pmtiles):
         tile_url = f"pmtiles://tiles/{tile_name}"
         tilejson["tiles"].append(tile_url)
         
@@ -844,20 +1264,27 @@ def create_tilejson():
         layer_name = 'layer'  # Standardized layer name for custom PMTiles
         custom_layer = {
             "id": layer_name,
-            "description": f"Custom layer: {tile_file.stem}",
-            "fields": {"id": "String", "name": "String"}  # Generic fields
+            "description": f"Custom layer: {tile_name[:-len('.pmtiles')]}",
+            "fields": LAYER_FIELDS
         }
         tilejson["vector_layers"].append(custom_layer)
         print(f"TILEJSON: Added custom PMTiles layer: {layer_name} from {tile_name}")
     
     # Write TileJSON file
     tilejson_path = TILE_DIR / "tilejson.json"
-    with open(tilejson_path, 'w') as f:
-        json.dump(tilejson, f, indent=2)
+    # Compact unless debugging; non-ASCII layer names are written as-is. The
+    # document is encoded in one go and written with a single call, rather
+    # than json.dump's many small chunk writes
+    if DEBUG:
+        tilejson_text = json.dumps(tilejson, indent=2, ensure_ascii=False)
+    else:
+        tilejson_text = json.dumps(tilejson, separators=(',', ':'), ensure_ascii=False)
+    tilejson_path.write_text(tilejson_text, encoding='utf-8')
     
     print(f"TILEJSON: TileJSON generated: {tilejson_path}")
-    print(f"   - {len([t for t in tilejson['tiles'] if t.startswith('pmtiles://tiles/') and '/' in t[15:]])} layer PMTiles sources")
-    print(f"   - {len([t for t in tilejson['tiles'] if t.startswith('pmtiles://tiles/') and '/' not in t[15:]])} root PMTiles sources") 
+    # Every root PMTiles file added one source; the rest came from layer directories
+    print(f"   - {len(tilejson['tiles']) - len(root_pmtiles)} layer PMTiles sources")
+    print(f"   - {len(root_pmtiles)} root PMTiles sources")
     print(f"   - {len(tilejson['vector_layers'])} vector layers")
     
     return tilejson_path
@@ -870,72 +1297,266 @@ def process_individual_layer(input_file, layer_dir, layer_name):
     """Process an individual layer into individual PMTiles for each zoom level"""
     print(f"  Processing {layer_name} into individual zoom-level PMTiles...")
     
-    # Generate individual PMTiles for each zoom level (6-16)
-    for zoom_level in range(6, 17):
-        output_pmtiles = layer_dir / f"{layer_name}_z{zoom_level}.pmtiles"
-        
-        # Get tippecanoe command for this zoom level
-        cmd = get_individual_zoom_tippecanoe_command(input_file, output_pmtiles, layer_name, zoom_level)
-        
-        try:
-            print(f"    Creating {layer_name}_z{zoom_level}.pmtiles...")
-            subprocess.run(cmd, check=True, capture_output=True, text=True)
-            print(f"    SUCCESS: {layer_name}_z{zoom_level}.pmtiles generated")
-        except subprocess.CalledProcessError as e:
-            print(f"    ERROR: Failed to create {layer_name}_z{zoom_level}.pmtiles")
-            print(f"    Command: {' '.join(cmd)}")
-            print(f"    Error: {e.stderr}")
-            continue
+    # Every zoom reads the same input, so convert it once to the cheaper format
+    # and ask the kernel to start reading it ahead
+    input_file = ensure_flatgeobuf(input_file)
+    advise_sequential_read(input_file)
+    
+    # Generate individual PMTiles for each zoom level (6-16). Each zoom is a
+    # separate tippecanoe run writing its own file, so several run at once
+    with ThreadPoolExecutor(max_workers=TIPPECANOE_RUNS_PER_FILE) as executor:
+        futures = [
+            executor.submit(create_layer_zoom_tiles, input_file, layer_dir, layer_name, zoom_level)
+            for zoom_level in range(6, 17)
+        ]
+        for future in futures:
+            future.result()
     
     print(f"  Completed processing {layer_name}")
 
+def ensure_flatgeobuf(input_file):
+    """Return a FlatGeobuf copy of a GeoJSON/GeoJSONSeq file, converting it if needed
+    
+    Tippecanoe reads FlatGeobuf much faster than GeoJSON, and the per-zoom
+    runs all read the same input. The copy sits beside the input and is
+    rebuilt when the input is newer. It is written without a spatial index,
+    which would reorder the features and break --preserve-input-order. Falls
+    back to the original file when ogr2ogr isn't installed or fails.
+    """
+    if input_file.suffix not in GEOJSON_SUFFIXES or not shutil.which('ogr2ogr'):
+        return input_file
+    
+    fgb_path = input_file.with_suffix('.fgb')
+    try:
+        if fgb_path.stat().st_mtime >= input_file.stat().st_mtime:
+            return fgb_path
+    except OSError:
+        pass
+    
+    # The temporary name keeps the .fgb extension; without it ogr2ogr would
+    # write a directory of per-layer files instead
+    tmp_path = fgb_path.with_name(f"{fgb_path.stem}.tmp.fgb")
+    try:
+        subprocess.run(
+            ['ogr2ogr', '-f', 'FlatGeobuf', '-lco', 'SPATIAL_INDEX=NO', str(tmp_path), str(input_file)],
+            check=True, capture_output=True, text=True
+        )
+        os.replace(tmp_path, fgb_path)
+    except subprocess.CalledProcessError as e:
+        print(f"    Warning: Could not convert {input_file.name} to FlatGeobuf, using it as is: {e.stderr}")
+        tmp_path.unlink(missing_ok=True)
+        return input_file
+    return fgb_path
+
+def advise_sequential_read(input_file):
+    """Hint that a tiling input will be read start to finish, where supported
+    
+    The advice applies to the file's pages in the page cache, so it helps the
+    tippecanoe processes that open the file afterwards. It is only a hint;
+    platforms without posix_fadvise (macOS, Windows) skip it.
+    """
+    if not hasattr(os, 'posix_fadvise'):
+        return
+    try:
+        fd = os.open(input_file, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+def create_layer_zoom_tiles(input_file, layer_dir, layer_name, zoom_level):
+    """Create the PMTiles for one zoom level of an individual layer"""
+    output_pmtiles = layer_dir / f"{layer_name}_z{zoom_level}.pmtiles"
+    partial_pmtiles = partial_output_path(output_pmtiles)
+    
+    # Get tippecanoe command for this zoom level
+    cmd = get_individual_zoom_tippecanoe_command(input_file, partial_pmtiles, layer_name, zoom_level)
+    
+    # Skip the run when the same command already built this file from the
+    # same input
+    stamp = tippecanoe_stamp(cmd, input_file)
+    if not FORCE and output_is_current(output_pmtiles, stamp):
+        print(f"    SKIPPED: {layer_name}_z{zoom_level}.pmtiles is up to date")
+        return
+    
+    try:
+        print(f"    Creating {layer_name}_z{zoom_level}.pmtiles...")
+        # Only stderr is kept, as bytes decoded just for error reports;
+        # tippecanoe's stdout isn't used
+        subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        os.replace(partial_pmtiles, output_pmtiles)
+        write_stamp(output_pmtiles, stamp)
+        print(f"    SUCCESS: {layer_name}_z{zoom_level}.pmtiles generated")
+    except subprocess.CalledProcessError as e:
+        partial_pmtiles.unlink(missing_ok=True)
+        print(f"    ERROR: Failed to create {layer_name}_z{zoom_level}.pmtiles")
+        print(f"    Command: {' '.join(cmd)}")
+        print(f"    Error: {e.stderr.decode('utf-8', 'replace')}")
+
+def partial_output_path(output_pmtiles):
+    """Where tippecanoe writes a PMTiles file before it is moved into place
+    
+    A hidden sibling in the same directory, so the finished file replaces
+    the previous one with a single rename and a failed run leaves the old
+    tiles untouched. The leading dot keeps it out of create_tilejson.
+    """
+    return output_pmtiles.with_name(f".{output_pmtiles.name}")
+
+def stamp_path(output_pmtiles):
+    """The hidden file recording what a PMTiles file was built from"""
+    return output_pmtiles.with_name(f".{output_pmtiles.stem}.stamp")
+
+def tippecanoe_stamp(cmd, input_file):
+    """Hash a tippecanoe command with its input's mtime and size"""
+    stat = os.stat(input_file)
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr(cmd).encode())
+    digest.update(f"{stat.st_mtime_ns}:{stat.st_size}".encode())
+    return digest.hexdigest()
+
+def output_is_current(output_pmtiles, stamp):
+    """Whether output_pmtiles exists and was built by the run stamp describes"""
+    try:
+        return output_pmtiles.exists() and stamp_path(output_pmtiles).read_text() == stamp
+    except OSError:
+        return False
+
+def write_stamp(output_pmtiles, stamp):
+    """Record the stamp of the run that just built output_pmtiles"""
+    path = stamp_path(output_pmtiles)
+    tmp_path = path.with_name(path.name + '.tmp')
+    tmp_path.write_text(stamp)
+    os.replace(tmp_path, path)
+
+# Building LOD configurations
+BUILDING_LOD_CONFIGS = {
+    'low': {
+        'zoom_range': {'min': 6, 'max': 11},
+        'suffix': '_low_lod'
+    },
+    'medium': {
+        'zoom_range': {'min': 11, 'max': 14},
+        'suffix': '_medium_lod'
+    },
+    'high': {
+        'zoom_range': {'min': 14, 'max': 16},
+        'suffix': '_high_lod'
+    }
+}
+
+# LOD-specific tippecanoe settings for building tiles
+BUILDING_LOD_SETTINGS = {
+    'low': (
+        '--simplification=10',
+        '--drop-rate=0.5',
+        '--buffer=8',
+    ),
+    'medium': (
+        '--simplification=5',
+        '--drop-rate=0.333',
+        '--buffer=8',
+    ),
+    'high': (
+        '--simplification=10',
+        '--drop-rate=0.1',
+        '--buffer=4',
+    ),
+}
+
 def create_building_tiles_individual(input_file, layer_dir, layer_name):
     """Create building PMTiles with individual zoom levels for each LOD"""
     print(f"  Processing buildings with individual zoom PMTiles...")
     
-    # Building LOD configurations
-    lod_configs = {
-        'low': {
-            'zoom_range': {'min': 6, 'max': 11},
-            'suffix': '_low_lod'
-        },
-        'medium': {
-            'zoom_range': {'min': 11, 'max': 14},
-            'suffix': '_medium_lod'
-        },
-        'high': {
-            'zoom_range': {'min': 14, 'max': 16},
-            'suffix': '_high_lod'
+    # Every LOD and zoom reads the same input, so convert it once and ask the
+    # kernel to start reading it ahead
+    input_file = ensure_flatgeobuf(input_file)
+    advise_sequential_read(input_file)
+    
+    # Every (LOD, zoom) pair writes its own file, so queue them all as one
+    # batch of tippecanoe runs; each thread just waits on its process
+    tasks = [
+        (lod_type, zoom)
+        for lod_type, config in BUILDING_LOD_CONFIGS.items()
+        for zoom in range(config['zoom_range']['min'], config['zoom_range']['max'] + 1)
+    ]
+    with ThreadPoolExecutor(max_workers=TIPPECANOE_RUNS_PER_FILE) as executor:
+        futures = {
+            executor.submit(create_building_zoom_tiles, input_file, layer_dir, layer_name, lod_type, zoom): (lod_type, zoom)
+            for lod_type, zoom in tasks
         }
-    }
-    
-    for lod_type, config in lod_configs.items():
-        print(f"    Processing {lod_type} LOD...")
-        
-        # Process each zoom level for this LOD
-        for zoom in range(config['zoom_range']['min'], config['zoom_range']['max'] + 1):
-            pmtiles_path = layer_dir / f"{layer_name}_{lod_type}_lod_z{zoom}.pmtiles"
-            
-            print(f"      Generating zoom level {zoom} for {lod_type} LOD...")
-            
-            # Create tippecanoe command for this specific zoom level and LOD
-            cmd = get_building_zoom_tippecanoe_command(input_file, pmtiles_path, f"{layer_name}_{lod_type}_lod", lod_type, zoom)
-            
+        for future in as_completed(futures):
+            lod_type, zoom = futures[future]
             try:
-                # Execute tippecanoe for this zoom level
-                result = subprocess.run(cmd, check=True, capture_output=True, text=True)
-                print(f"      SUCCESS: {layer_name}_{lod_type}_lod_z{zoom}.pmtiles generated")
-                
-            except subprocess.CalledProcessError as e:
-                print(f"      ERROR: Failed to generate {lod_type} LOD zoom {zoom}: {e.stderr if e.stderr else str(e)}")
-                continue
+                future.result()
+            except Exception as e:
+                print(f"    ERROR: {lod_type} LOD zoom {zoom} failed: {e}")
     
     print(f"  Completed processing buildings for {layer_name}")
 
+def create_building_zoom_tiles(input_file, layer_dir, layer_name, lod_type, zoom):
+    """Create the PMTiles for one zoom level of one building LOD"""
+    pmtiles_path = layer_dir / f"{layer_name}_{lod_type}_lod_z{zoom}.pmtiles"
+    partial_pmtiles = partial_output_path(pmtiles_path)
+    
+    print(f"      Generating zoom level {zoom} for {lod_type} LOD...")
+    
+    # Create tippecanoe command for this specific zoom level and LOD
+    cmd = get_building_zoom_tippecanoe_command(input_file, partial_pmtiles, f"{layer_name}_{lod_type}_lod", lod_type, zoom)
+    
+    # Skip the run when the same command already built this file from the
+    # same input
+    stamp = tippecanoe_stamp(cmd, input_file)
+    if not FORCE and output_is_current(pmtiles_path, stamp):
+        print(f"      SKIPPED: {layer_name}_{lod_type}_lod_z{zoom}.pmtiles is up to date")
+        return
+    
+    try:
+        # Execute tippecanoe for this zoom level
+        subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        os.replace(partial_pmtiles, pmtiles_path)
+        write_stamp(pmtiles_path, stamp)
+        print(f"      SUCCESS: {layer_name}_{lod_type}_lod_z{zoom}.pmtiles generated")
+        
+    except subprocess.CalledProcessError as e:
+        partial_pmtiles.unlink(missing_ok=True)
+        print(f"      ERROR: Failed to generate {lod_type} LOD zoom {zoom}: {e.stderr.decode('utf-8', 'replace') if e.stderr else str(e)}")
+
+# Settings added by get_individual_zoom_tippecanoe_command for each filename kind
+INDIVIDUAL_ZOOM_SETTINGS = {
+    'water': (
+        '--detect-shared-borders',
+        '--no-tiny-polygon-reduction',
+        '--buffer=64',
+        '--drop-fraction-as-needed',
+        '--preserve-input-order',
+        '--maximum-tile-bytes=1048576',
+    ),
+    'road': (
+        '--drop-rate=0.05',
+        '--drop-smallest',
+        '--simplification=10',
+        '--buffer=16',
+        '--coalesce-smallest-as-needed',
+        '--preserve-input-order',
+        '--maximum-tile-bytes=1048576',
+    ),
+    # Default for places, land, etc.
+    'default': (
+        '--simplification=10',
+        '--drop-densest-as-needed',
+        '--detect-shared-borders',
+        '--maximum-tile-bytes=1048576',
+        '--buffer=16',
+    ),
+}
+
 def get_individual_zoom_tippecanoe_command(input_path, output_pmtiles, layer_name, zoom_level):
     """Get simplified tippecanoe command for generating a specific zoom level PMTiles"""
-    filename = Path(input_path).name.lower()
-    
     # Base command for specific zoom level
     base_cmd = [
         'tippecanoe',
@@ -943,40 +1564,15 @@ def get_individual_zoom_tippecanoe_command(input_path, output_pmtiles, layer_nam
         f'-z{zoom_level}',
         f'-Z{zoom_level}',
         '-l', layer_name,
-        '--clip-bounding-box', f"{extent_xmin},{extent_ymin},{extent_xmax},{extent_ymax}",
+        '--clip-bounding-box', clip_bounding_box,
         '-P',
         str(input_path)
     ]
     
     # Add layer-specific settings based on filename patterns (simplified)
-    if 'water' in filename:
-        return base_cmd + [
-            '--detect-shared-borders',
-            '--no-tiny-polygon-reduction',
-            '--buffer=64',
-            '--drop-fraction-as-needed',
-            '--preserve-input-order',
-            '--maximum-tile-bytes=1048576'
-        ]
-    elif 'road' in filename:
-        return base_cmd + [
-            '--drop-rate=0.05',
-            '--drop-smallest',
-            '--simplification=10',
-            '--buffer=16',
-            '--coalesce-smallest-as-needed',
-            '--preserve-input-order',
-            '--maximum-tile-bytes=1048576'
-        ]
-    else:
-        # Default for places, land, etc.
-        return base_cmd + [
-            '--simplification=10',
-            '--drop-densest-as-needed',
-            '--detect-shared-borders',
-            '--maximum-tile-bytes=1048576',
-            '--buffer=16'
-        ]
+    base_cmd.extend(INDIVIDUAL_ZOOM_SETTINGS[filename_settings_kind(os.path.basename(input_path))])
+    
+    return base_cmd
 
 def get_building_zoom_tippecanoe_command(input_path, output_pmtiles, layer_name, lod_type, zoom_level):
     """Get tippecanoe command for generating building PMTiles at a specific zoom level and LOD"""
@@ -986,7 +1582,7 @@ def get_building_zoom_tippecanoe_command(input_path, output_pmtiles, layer_name,
         f'-z{zoom_level}',           # Maximum zoom = this specific zoom level
         f'-Z{zoom_level}',           # Minimum zoom = this specific zoom level
         '-l', layer_name,
-        '--clip-bounding-box', f"{extent_xmin},{extent_ymin},{extent_xmax},{extent_ymax}",
+        '--clip-bounding-box', clip_bounding_box,
         
         # Common building options
         '--drop-smallest',
@@ -1000,67 +1596,31 @@ def get_building_zoom_tippecanoe_command(input_path, output_pmtiles, layer_name,
     ]
     
     # LOD-specific settings
-    if lod_type == 'low':
-        base_cmd.extend([
-            '--simplification=10',
-            '--drop-rate=0.5',
-            '--buffer=8',
-        ])
-    elif lod_type == 'medium':
-        base_cmd.extend([
-            '--simplification=5',
-            '--drop-rate=0.333',
-            '--buffer=8',
-        ])
-    elif lod_type == 'high':
-        base_cmd.extend([
-            '--simplification=10',
-            '--drop-rate=0.1',
-            '--buffer=4',
-        ])
+    base_cmd.extend(BUILDING_LOD_SETTINGS.get(lod_type, ()))
     
     return base_cmd
 
 def get_db_url(sql_section):
     """Extract URL and data type information from a SQL section"""
-    # Define patterns to match different Overture data sources
-    patterns = [
-        # S3 patterns
-        {
-            'pattern': r"read_parquet\('(s3://overturemaps-us-west-2/release/[\d-]+\.\d+/theme=([^/]+)/type=([^/]+)/\*)'",
-            'description_template': "Downloading {data_type} data from Overture Maps ({theme} theme)",
-        },
-        # Azure blob patterns
-        {
-            'pattern': r"read_parquet\('(az://overturemapswestus2\.blob\.core\.windows\.net/release/[\d-]+[\w.-]*/theme=([^/]+)/type=([^/]+)/\*)'",
-            'description_template': "Downloading {data_type} data from Overture Maps ({theme} theme)",
-        },
-        # Places pattern (special case with wildcards)
-        {
-            'pattern': r"read_parquet\('(s3://overturemaps-us-west-2/release/[\d-]+\.\d+/theme=([^/]+)/\*)/\*'",
-            'description_template': "Downloading {theme} data from Overture Maps",
-        }
-    ]
-    
     # Extract output file path
-    output_match = re.search(r"TO '([^']+)'", sql_section)
+    output_match = OUTPUT_FILE_PATTERN.search(sql_section)
     output_file = output_match.group(1).split('/')[-1] if output_match else "unknown"
     
-    # Try to match each pattern
-    for pattern_info in patterns:
-        match = re.search(pattern_info['pattern'], sql_section)
-        if match:
-            url = match.group(1)
-            theme = match.group(2)
+    # Find the first Overture source, whichever URL type it is
+    match = OVERTURE_PARQUET_PATTERN.search(sql_section)
+    if not match:
+        return None
+    
+    for (url_group, theme_group, data_type_group), description_template in DB_URL_SOURCES:
+        url = match.group(url_group)
+        if url:
+            theme = match.group(theme_group)
+            
+            # Get data type from its group if there is one, otherwise use theme
+            data_type = match.group(data_type_group) if data_type_group else theme
             
-            # Get data type from the third group if it exists, otherwise use theme
-            if len(match.groups()) >= 3:
-                data_type = match.group(3)
-            else:
-                data_type = theme
-                
             # Format the description
-            description = pattern_info['description_template'].format(
+            description = description_template.format(
                 data_type=data_type.replace('_', ' ').title(),
                 theme=theme.replace('_', ' ').title()
             )
@@ -1083,7 +1643,7 @@ def get_theme_tippecanoe_command(theme_name, theme_tile_path, layer_files):
         '--simplification=10',  # Moderate simplification for most themes
         '--maximum-zoom=15',
         '--minimum-zoom=8',         # Points visible at lower zooms
-        '--clip-bounding-box', f"{extent_xmin},{extent_ymin},{extent_xmax},{extent_ymax}",
+        '--clip-bounding-box', clip_bounding_box,
         '--cluster-maxzoom=11',
     ]
     
@@ -1091,10 +1651,9 @@ def get_theme_tippecanoe_command(theme_name, theme_tile_path, layer_files):
     for layer_name, file_path in layer_files.items():
         print(f"Adding layer '{layer_name}' from file: {file_path}")
         # Use --named-layer for .geojsonseq files as recommended
-        if file_path.name.endswith('.geojsonseq'):
-            base_cmd.extend(['--named-layer', f'{layer_name}:{file_path}'])
-        else:
-            base_cmd.extend(['-L', f'{layer_name}:{file_path}'])
+        file_str = os.fspath(file_path)
+        layer_flag = '--named-layer' if file_str.endswith('.geojsonseq') else '-L'
+        base_cmd.extend((layer_flag, f'{layer_name}:{file_str}'))
     
     # Add theme-specific optimizations
     if theme_name == 'settlement-extents':
@@ -1117,30 +1676,47 @@ def get_theme_tippecanoe_command(theme_name, theme_tile_path, layer_files):
     
     return base_cmd
 
-if __name__ == "__main__":
+def run_download(args):
+    """Download source data only"""
+    download_source_data()
+
+def run_tiles(args):
+    """Process to tiles only, optionally limited to files matching --filter"""
+    process_to_tiles(filter_pattern=args.filter)
+    create_tilejson()
+
+def run_all(args):
+    """Run both steps"""
+    run_download(args)
+    run_tiles(args)
+
+# Command-line commands and the functions that run them
+COMMANDS = {
+    'download': run_download,
+    'tiles': run_tiles,
+    'all': run_all,
+}
+
+def main(argv=None):
+    """Parse the command line and run the chosen command
+    
+    Everything runs from here rather than at module level, so the tiling
+    worker processes that import this module only get its definitions.
+    """
     parser = argparse.ArgumentParser(description='Process geospatial data into PMTiles')
-    parser.add_argument('command', choices=['download', 'tiles', 'all'],
+    parser.add_argument('command', choices=list(COMMANDS), type=str.lower,
                         help='Command to execute')
-    parser.add_argument('--filter', help='Only process files matching this pattern (e.g., "roads*" or "places.geojson")')
+    parser.add_argument('--filter', nargs='+',
+                        help='Only process files matching any of these patterns (e.g., "roads*" "places.geojson")')
+    parser.add_argument('--debug', '--verbose', action='store_true',
+                        help='Log tippecanoe settings decisions and write indented TileJSON')
+    parser.add_argument('--force', action='store_true',
+                        help='Rebuild PMTiles even when their inputs and commands are unchanged')
     
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
     
-    command = args.command.lower()
-    
-    if command == "download":
-        download_source_data()
-    elif command == "tiles":
-        process_to_tiles(filter_pattern=args.filter)
-        create_tilejson()
-    elif command == "all":
-        download_source_data()
-        process_to_tiles(filter_pattern=args.filter)
-        create_tilejson()
-    else:
-        print(f"Unknown command: {command}")
-        print("Usage:")
-        print("  python runCreateTiles.py download                     # Download source data only")
-        print("  python runCreateTiles.py tiles                        # Process to tiles only")
-        print("  python runCreateTiles.py tiles --filter='roads*'      # Process only matching files")
-        print("  python runCreateTiles.py all                          # Run both steps")
-        sys.exit(1)
\ No newline at end of file
+    # argparse has already rejected anything that isn't a known command
+    COMMANDS[args.command](args)
+
+if __name__ == "__main__":
+    main()
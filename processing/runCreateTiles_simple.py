@@ -1,8 +1,28 @@
 import duckdb
 import os
 import subprocess
-import fnmatch
+import argparse
 import re
+import hashlib
+import json
+import logging
+import logging.handlers
+import queue
+import atexit
+import itertools
+import functools
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# Log records from worker threads are queued and written by one listener
+# thread, so workers never block on the console. The listener only runs while
+# main() does; importing this module for its helpers doesn't start it
+log = logging.getLogger('overture')
+log.setLevel(logging.INFO)
+log_queue = queue.Queue()
+log_queue_handler = logging.handlers.QueueHandler(log_queue)
+log_handler = logging.StreamHandler()
+log_handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(message)s'))
+log_listener = logging.handlers.QueueListener(log_queue, log_handler)
 
 # extent parameters for New York State
 # extent_xmin = -79.76259
@@ -38,65 +58,431 @@ buffered_xmax = extent_xmax + buffer_degrees
 buffered_ymin = extent_ymin - buffer_degrees
 buffered_ymax = extent_ymax + buffer_degrees
 
+# Patterns matching the different Overture data sources, with the description
+# template used for each when reporting progress
+db_url_patterns = (
+    # S3 patterns
+    (
+        re.compile(r"read_parquet\('(s3://overturemaps-us-west-2/release/[\d-]+\.\d+/theme=([^/]+)/type=([^/]+)/\*)'", re.ASCII),
+        "Downloading {data_type} data from Overture Maps ({theme} theme)",
+    ),
+    # Azure blob patterns
+    (
+        re.compile(r"read_parquet\('(az://overturemapswestus2\.blob\.core\.windows\.net/release/[\d-]+[\w.-]*/theme=([^/]+)/type=([^/]+)/\*)'", re.ASCII),
+        "Downloading {data_type} data from Overture Maps ({theme} theme)",
+    ),
+    # Places pattern (special case with wildcards)
+    (
+        re.compile(r"read_parquet\('(s3://overturemaps-us-west-2/release/[\d-]+\.\d+/theme=([^/]+)/\*)/\*'", re.ASCII),
+        "Downloading {theme} data from Overture Maps",
+    ),
+)
 
-def download_source_data():
-    """Download and process source data from Overture Maps
+# Matches the $extent_* variables in the SQL file
+extent_variable_pattern = re.compile(r'\$extent_(xmin|xmax|ymin|ymax)')
+
+# Separates the sections of the SQL file
+breakpoint_pattern = re.compile(r'-- breakpoint')
+
+# Matches the output path of a COPY ... TO '...' statement
+output_file_pattern = re.compile(r"TO '([^']+)'")
+
+# Persistent DuckDB database caching each section's query result, so repeated
+# runs with the same release and extent skip the S3/Azure download
+cache_db_path = '/Users/matthewheaton/GitHub/basemap/overture/cache.duckdb'
+
+# Matches a section's "COPY (<query>) TO '<file>' <options>" statement
+copy_section_pattern = re.compile(
+    r"^(?P<setup>.*?)COPY\s*\((?P<query>.*)\)\s*TO\s*'(?P<output>[^']+)'(?P<options>[^;]*);?\s*$",
+    re.DOTALL
+)
+
+# Maximum number of SQL sections downloaded at once
+download_max_workers = 8
+
+# DuckDB memory limit in GB; set with --mem-gb on the command line
+duckdb_memory_gb = 8
+
+def get_section_setup_sql(parallel_sections=1):
+    """Setup for a DuckDB instance that executes SQL sections
     
-    Uses a buffered extent to ensure complete features at map boundaries.
-    The buffer helps prevent edge clipping when generating tiles.
+    Threads and the memory limit are global to an instance. The download
+    sections all share one instance (see get_connection), so it is set up once
+    with every core. Streamed sections each run in their own duckdb process,
+    so the cores and memory are split between the processes running at once.
     """
-    print("=== DOWNLOADING SOURCE DATA ===")
-    print(f"Map extent: {extent_xmin}, {extent_ymin} to {extent_xmax}, {extent_ymax}")
-    print(f"Download extent (buffered): {buffered_xmin}, {buffered_ymin} to {buffered_xmax}, {buffered_ymax}")
-    print(f"Buffer: {buffer_degrees} degrees (~{buffer_degrees * 111:.1f}km)")
-    print()
-        
-    # Path to SQL file
-    sql_file_path = '/Users/matthewheaton/GitHub/basemap/overture/tileQueries'
+    threads = max(1, (os.cpu_count() or 1) // max(1, parallel_sections))
+    memory_mb = max(1, int(duckdb_memory_gb * 1024) // max(1, parallel_sections))
+    return f"""
+INSTALL spatial; LOAD spatial;
+INSTALL httpfs; LOAD httpfs;
+SET s3_region='us-west-2';
+SET threads={threads};
+SET memory_limit='{memory_mb}MB';
+PRAGMA enable_object_cache;
+"""
 
-    # Read the SQL file
-    with open(sql_file_path, 'r') as file:
-        sql_content = file.read()
+# Bounds for the Hilbert curve that orders cached features, so the GeoJSONSeq
+# handed to tippecanoe is already close to spatially sorted
+hilbert_bounds_sql = (
+    f"{{'min_x': {buffered_xmin}, 'min_y': {buffered_ymin}, "
+    f"'max_x': {buffered_xmax}, 'max_y': {buffered_ymax}}}::BOX_2D"
+)
+
+# Scratch space for tippecanoe's external sort; point TIPPECANOE_TMP at a fast
+# local disk so large inputs don't spill to a slow /tmp
+tippecanoe_tmp_dir = os.environ.get('TIPPECANOE_TMP', '/Users/matthewheaton/GitHub/basemap/overture/tiptmp')
+
+# tippecanoe options for each kind of input, excluding the output path, layer
+# name, and input file
+tippecanoe_profiles = {
+    'water': [
+        # Preserve polygon topology with optimized simplification
+        '-zg',
+        '--detect-shared-borders',  # Better polygon boundary handling
+        # '--simplification=10',  # Less aggressive simplification for higher quality
+        '--no-tiny-polygon-reduction',  # Preserve small water bodies
+        '--low-detail=13',  # Simplified geometry until zoom 13
+        '--full-detail=15',  # Full detail starting at zoom 15
+        '--no-feature-limit',  # Don't limit features per tile
+        '--buffer=64',  # Moderate buffer to prevent edge artifacts
+        '--drop-fraction-as-needed',  # Better than dropping whole features
+        '--preserve-input-order',  # Maintain feature order from input
+        '--coalesce-densest-as-needed',  # Better polygon merging
+        '--extend-zooms-if-still-dropping',  # Keep trying to fit all features
+        '--maximum-tile-bytes=1048576',  # 1MB tile limit for higher quality
+        '-P',
+    ],
+    'roads': [
+        '-z14',  # Match max zoom of map
+        '-Z11',  # Start at map's minimum zoom level
+        # '--simplify-only-low-zooms',  # Keep detail at high zoom levels
+        '--drop-rate=0.05',  # Keep most features, drop only N%
+        '--drop-smallest',  # Drop smallest features first
+        '--simplification=10',  # Use moderate simplification
+        '--buffer=16',  # buffer for smoother line rendering
+        '--extend-zooms-if-still-dropping',
+        '--maximum-tile-bytes=1048576',  # 1MB tile limit for roads
+        '--coalesce-smallest-as-needed',  # Merge small road segments
+        '--preserve-input-order',  # Maintain feature order
+        '--minimum-detail=14',  # Start preserving full detail at zoom 15
+        '-P',
+    ],
+    'default': [
+        # Default settings for other polygon features (land, land_use, etc.)
+        '-zg',
+        '--simplification=10',
+        '--low-detail=11',  # Simplified geometry until zoom 11
+        '--full-detail=14',  # Full detail starting at zoom 14
+        '--drop-densest-as-needed',
+        '--detect-shared-borders',  # Better polygon boundary handling
+        '--maximum-tile-bytes=1048576',  # 1MB tile limit for smaller sizes
+        '--buffer=16',  # Moderate buffer
+        '--extend-zooms-if-still-dropping',
+        '-P',
+    ],
+    'building_low_lod': [
+        # Low-LOD buildings: aggressive simplification for performance
+        '-z9',  # Lower max zoom for low-LOD
+        '-Z0',  # Start at zoom 0
+        '--simplification=10',  # Less aggressive simplification to preserve building shapes
+        '--drop-rate=0.25',     # Drop N% of features
+        '--drop-smallest',     # Drop smallest buildings first
+        '--buffer=32',          # Smaller buffer for tighter tiles
+        '--maximum-tile-bytes=2097152',  # 2MB tiles for better detail
+        '--coalesce-smallest-as-needed',
+        '--detect-shared-borders',
+        '-P',
+    ],
+    'building_medium_lod': [
+        # Medium-LOD buildings: balance detail and performance
+        '-z13',  # Max zoom for medium-LOD
+        '-Z10',  # Start at zoom 10
+        '--simplification=10',
+        '--drop-rate=0.1',     # Drop N% of features
+        '--drop-smallest',     # Drop smallest buildings first
+        '--buffer=16',          # Moderate buffer
+        '--maximum-tile-bytes=2097152',  # 2MB tiles for better detail
+        '--coalesce-smallest-as-needed',
+        '--detect-shared-borders',
+        '-P',
+    ],
+    'building_high_lod': [
+        # High-LOD buildings: preserve more detail, start later for clear distinction
+        '-z16',  # Higher max zoom for high-LOD
+        '-Z14',  # Start at zoom 14
+        '--simplification=8',  # Lower simplification for higher detail
+        '--drop-rate=0.05',     # Drop 20% of features
+        '--drop-smallest',     # Drop smallest buildings first
+        '--buffer=8',          # Larger buffer for smoother transitions
+        '--maximum-tile-bytes=2097152',  # 2MB tiles for better detail
+        '--coalesce-smallest-as-needed',
+        '--detect-shared-borders',
+        '--preserve-input-order',
+        '-P',
+    ],
+}
 
-    # Replace the variables in the SQL content with buffered extent
-    sql_content = sql_content.replace('$extent_xmin', str(buffered_xmin))
-    sql_content = sql_content.replace('$extent_xmax', str(buffered_xmax))
-    sql_content = sql_content.replace('$extent_ymin', str(buffered_ymin))
-    sql_content = sql_content.replace('$extent_ymax', str(buffered_ymax))
+# Matches downloaded GeoJSON/GeoJSONSeq inputs, but not the intermediate files
+# written by prefilter_buildings and shard_buildings
+input_file_pattern = re.compile(r'^(?!.*(?:_filtered|_shard_\d+_\d+)\.geojsonseq$).*\.geojson(?:seq)?$')
 
-    # Split the SQL content into sections based on '-- breakpoint'
-    sql_sections = sql_content.split('-- breakpoint')
+# Feature class keywords in data filenames; the first match decides the class
+file_kind_pattern = re.compile(r'(water|roads|building|land)')
 
-    # Connect to DuckDB
-    conn = duckdb.connect()
+# Building inputs smaller than this are tiled directly without pre-filtering
+prefilter_min_bytes = 64 * 1024 * 1024  # 64MB
+
+# Large building files are split into a shard_grid_size x shard_grid_size grid
+# of shards that are tiled independently and merged with tile-join
+shard_grid_size = 3  # Use ~8 for country-scale extents
+
+
+def read_sql_sections():
+    """Read the SQL file and yield its executable sections as (index, sql) pairs
+    
+    The extent variables are replaced with the buffered extent, and empty
+    sections and SET commands are skipped. Sections are sliced out of the file
+    one at a time instead of splitting it into a list up front.
+    """
+    # Path to SQL file
+    sql_file_path = '/Users/matthewheaton/GitHub/basemap/overture/tileQueries'
 
-    # Execute each section
-    for i, section in enumerate(sql_sections):
-        section = section.strip()
+    # Replace the variables in the SQL content with buffered extent in a
+    # single pass over the file
+    extent_values = {
+        'xmin': str(buffered_xmin),
+        'xmax': str(buffered_xmax),
+        'ymin': str(buffered_ymin),
+        'ymax': str(buffered_ymax),
+    }
+    with open(sql_file_path, 'r') as file:
+        sql_content = extent_variable_pattern.sub(lambda m: extent_values[m.group(1)], file.read())
+
+    # Yield the sections between '-- breakpoint' markers
+    start = 0
+    for i, match in enumerate(itertools.chain(breakpoint_pattern.finditer(sql_content), [None])):
+        end = match.start() if match else len(sql_content)
+        section = sql_content[start:end].strip()
+        if match:
+            start = match.end()
         if section and not section.startswith('SET extent_'):  # Skip empty sections and SET commands
+            yield i, section
+
+def download_source_data():
+    """Download and process source data from Overture Maps
+    
+    Uses a buffered extent to ensure complete features at map boundaries.
+    The buffer helps prevent edge clipping when generating tiles.
+    """
+    log.info("=== DOWNLOADING SOURCE DATA ===")
+    log.info(f"Map extent: {extent_xmin}, {extent_ymin} to {extent_xmax}, {extent_ymax}")
+    log.info(f"Download extent (buffered): {buffered_xmin}, {buffered_ymin} to {buffered_xmax}, {buffered_ymax}")
+    log.info(f"Buffer: {buffer_degrees} degrees (~{buffer_degrees * 111:.1f}km)")
+        
+    # Each section is an independent COPY against its own Overture theme, so
+    # they can be downloaded concurrently as they are read from the file
+    with ThreadPoolExecutor(max_workers=download_max_workers) as executor:
+        futures = {}
+        for i, section in read_sql_sections():
             # Extract URL and data type from the section
             url_info = get_db_url(section)
             if url_info:
-                print(f"Executing section {i + 1}: {url_info['description']}")
-                print(f"  → Querying: {url_info['url']}")
-                print(f"  → Output: {url_info['output_file']}")
+                log.info(f"Queueing section {i + 1}: {url_info['description']}")
+                log.info(f"  → Querying: {url_info['url']}")
+                log.info(f"  → Output: {url_info['output_file']}")
             else:
-                print(f"Executing section {i + 1}...")
-            
+                log.info(f"Queueing section {i + 1}...")
+            futures[executor.submit(run_sql_section, section)] = (i, section)
+
+        for future in as_completed(futures):
+            i, section = futures[future]
+            try:
+                future.result()
+                log.info(f"  ✓ Section {i + 1} executed successfully.")
+            except Exception as e:
+                log.error(f"  ✗ Error executing section {i + 1}: {e}")
+                log.error(f"  Section content: {section[:200]}...")
+
+    log.info("=== SOURCE DATA DOWNLOAD COMPLETE ===")
+
+@functools.lru_cache(maxsize=1)
+def get_connection():
+    """Return the connection to the cache database shared by every section
+    
+    Every duckdb.connect() of the same file within a process opens the same
+    database instance, with one catalog and one set of global settings, so
+    separate connections per section would not isolate anything. Extensions
+    and settings are set up here once instead, and each section runs on its
+    own cursor.
+    """
+    conn = duckdb.connect(cache_db_path)
+    conn.execute(get_section_setup_sql())
+    atexit.register(conn.close)
+    return conn
+
+def run_sql_section(section, ingest=True):
+    """Execute one SQL section on its own cursor of the shared connection
+    
+    A DuckDB connection can't be used from several threads at once, but its
+    cursors can, and they share its database, extensions and settings. Any
+    setup statements at the start of the section run on the section's cursor.
+    
+    COPY sections are split into an ingest step, which downloads the query
+    result into the persistent cache database, and an export step, which
+    writes the output file from the cached table. With ingest=False a section
+    that isn't cached yet raises LookupError instead of touching S3/Azure.
+    """
+    conn = get_connection().cursor()
+    try:
+        match = copy_section_pattern.match(section)
+        if not match:
+            conn.execute(section)
+            return
+
+        if match.group('setup').strip():
+            conn.execute(match.group('setup'))
+
+        query = match.group('query').strip()
+        table_name = get_cache_table_name(query)
+        if not is_cached(conn, table_name):
+            if not ingest:
+                raise LookupError(f"{os.path.basename(match.group('output'))} is not cached; run download first")
+            ingest_section(conn, table_name, query)
+
+        export_section(conn, table_name, match.group('output'), match.group('options'))
+    finally:
+        conn.close()
+
+def get_cache_table_name(query):
+    """Name the cache table after a hash of the query
+    
+    The query already contains the release URL and the substituted extent, so
+    each distinct download gets its own table.
+    """
+    return f"hilbert_{hashlib.sha1(query.encode()).hexdigest()[:16]}"
+
+def is_cached(conn, table_name):
+    """Check whether a cache table exists"""
+    return conn.execute(
+        "SELECT 1 FROM duckdb_tables() WHERE table_name = ?", [table_name]
+    ).fetchone() is not None
+
+def ingest_section(conn, table_name, query):
+    """Download a section's query result into a cache table
+    
+    Rows are stored in Hilbert order so nearby features stay together in the
+    exported file, and an R-tree index on the geometry keeps later bbox
+    subsets of the table cheap.
+    """
+    conn.execute(f"""
+        CREATE TABLE {table_name} AS
+        SELECT * FROM ({query})
+        ORDER BY ST_Hilbert(geometry, {hilbert_bounds_sql})
+    """)
+    conn.execute(f"CREATE INDEX idx_{table_name}_geom ON {table_name} USING RTREE (geometry)")
+
+def export_section(conn, table_name, output, options):
+    """Write a cached section to its output file"""
+    conn.execute(f"COPY {table_name} TO '{output}'{options}")
+
+def export_source_data():
+    """Rewrite the GeoJSONSeq files from the cache database without downloading"""
+    log.info("=== EXPORTING CACHED SOURCE DATA ===")
+
+    with ThreadPoolExecutor(max_workers=download_max_workers) as executor:
+        futures = {
+            executor.submit(run_sql_section, section, False): i
+            for i, section in read_sql_sections()
+        }
+        for future in as_completed(futures):
+            i = futures[future]
             try:
-                conn.execute(section)
-                print(f"  ✓ Section {i + 1} executed successfully.")
+                future.result()
+                log.info(f"  ✓ Section {i + 1} exported successfully.")
             except Exception as e:
-                print(f"  ✗ Error executing section {i + 1}: {e}")
-                print(f"  Section content: {section[:200]}...")
+                log.error(f"  ✗ Error exporting section {i + 1}: {e}")
+
+    log.info("=== EXPORT COMPLETE ===")
+
+def classify_file(filename):
+    """Return the feature class ('water', 'roads', 'building', 'land') of a data file, or None"""
+    match = file_kind_pattern.search(filename)
+    return match.group(1) if match else None
+
+def build_tippecanoe_cmd(geojson_file, input_path, tile_path, profile=None):
+    """Build the tippecanoe command for a GeoJSON/GeoJSONSeq file
+    
+    The profile defaults to the file's feature class, falling back to
+    'default'. When input_path is None the command reads features from stdin.
+    """
+    if profile is None:
+        kind = classify_file(geojson_file)
+        profile = kind if kind in tippecanoe_profiles else 'default'
+
+    os.makedirs(tippecanoe_tmp_dir, exist_ok=True)
+    cmd = [
+        'tippecanoe', '-fo', tile_path, '-l', 'layer',
+        '-t', tippecanoe_tmp_dir,
+        *tippecanoe_profiles[profile],
+    ]
+    if input_path is not None:
+        cmd.append(input_path)
+    return cmd
+
+def build_hash(recipe):
+    """Hash the command or SQL that produces an output file"""
+    return hashlib.sha1(json.dumps(recipe).encode()).hexdigest()
+
+def is_up_to_date(output_path, input_path, recipe):
+    """Check whether output_path was built from the current input_path with the same recipe
+    
+    The recipe hash is stored next to the output in an .argvhash file by
+    record_build(), so changing tippecanoe options or the extent also forces a
+    rebuild.
+    """
+    try:
+        if os.path.getmtime(output_path) < os.path.getmtime(input_path):
+            return False
+        with open(f"{output_path}.argvhash") as f:
+            return f.read().strip() == build_hash(recipe)
+    except OSError:
+        return False
+
+def record_build(output_path, recipe):
+    """Store the recipe hash for a freshly built output file"""
+    with open(f"{output_path}.argvhash", 'w') as f:
+        f.write(build_hash(recipe))
+
+def run_tippecanoe(cmd):
+    """Run a tippecanoe command, writing its progress output to <tile>.log
+    
+    Output goes straight to the log file instead of being buffered in Python,
+    so concurrent runs don't interleave on the console and each one can be
+    tailed while it works. Returns False without running anything when the
+    tiles are already newer than the input and were built with the same
+    command.
+    """
+    tile_path = cmd[cmd.index('-fo') + 1]
+    if is_up_to_date(tile_path, cmd[-1], cmd):
+        return False
+
+    log_path = f"{tile_path}.log"
+    with open(log_path, 'w') as log_file:
+        returncode = subprocess.Popen(cmd, stdout=log_file, stderr=subprocess.STDOUT).wait()
+    if returncode:
+        raise subprocess.CalledProcessError(returncode, cmd, output=f"see {log_path}")
 
-    # Close the connection
-    conn.close()
-    print("=== SOURCE DATA DOWNLOAD COMPLETE ===\n")
+    record_build(tile_path, cmd)
+    return True
 
 def process_to_tiles():
-    """Process GeoJSON/GeoJSONSeq files into PMTiles"""
-    print("=== PROCESSING TO TILES ===")
+    """Process GeoJSON/GeoJSONSeq files into PMTiles
+    
+    Every tippecanoe invocation is independent, so they are run concurrently.
+    Buildings are expanded into one job per LOD.
+    """
+    log.info("=== PROCESSING TO TILES ===")
     
     # Path to the directory containing the GeoJSON/GeoJSONSeq files
     data_dir = '/Users/matthewheaton/GitHub/basemap/overture/data/'
@@ -105,224 +491,303 @@ def process_to_tiles():
     # Ensure directories exist
     os.makedirs(tile_dir, exist_ok=True)
 
-    # Find all files in data_dir that are GeoJSON/GeoJSONSeq and not .pmtiles
-    geojson_files = [
-        f for f in os.listdir(data_dir)
-        if (f.endswith('.geojson') or f.endswith('.geojsonseq')) and not f.endswith('.pmtiles') 
-        and 'building' in f 
-        # and 'buildings' not in f  # Uncomment to exclude buildings
-    ]
+    # Find and classify all GeoJSON/GeoJSONSeq files in data_dir in a single
+    # pass, recording sizes so the largest inputs can be started first
+    entries = []
+    with os.scandir(data_dir) as it:
+        for entry in it:
+            if not input_file_pattern.match(entry.name):
+                continue
+            kind = classify_file(entry.name)
+            if kind != 'building':  # Only buildings for now; remove to process every class
+                continue
+            entries.append((entry.name, entry.stat().st_size, kind))
+    entries.sort(key=lambda e: e[1], reverse=True)
 
-    if not geojson_files:
-        print("No GeoJSON/GeoJSONSeq files found. Run download_source_data() first.")
+    if not entries:
+        log.info("No GeoJSON/GeoJSONSeq files found. Run download_source_data() first.")
         return
 
-    print(f"Found {len(geojson_files)} files to process:")
-    for f in geojson_files:
-        print(f"  - {f}")
+    log.info(f"Found {len(entries)} files to process:")
+    for name, size, _ in entries:
+        log.info(f"  - {name} ({size / 1024 / 1024:.1f}MB)")
 
-    # Tippecanoe CLI options
-    layer_name = 'layer'
-
-    # Process each GeoJSON/GeoJSONSeq file into tiles
-    for geojson_file in geojson_files:
+    # Build a (label, command) job for every tippecanoe run, plus a
+    # (label, command, shard labels) tile-join merge for every sharded
+    # building LOD
+    jobs = []
+    merges = []
+    for geojson_file, _, kind in entries:
         input_path = os.path.join(data_dir, geojson_file)
         tile_path = os.path.join(tile_dir, f"{os.path.splitext(geojson_file)[0]}.pmtiles")
-        
-        # Check if input file exists
-        if not os.path.exists(input_path):
-            print(f"Warning: {input_path} does not exist, skipping...")
+
+        if kind == 'building':
+            # Special handling for buildings - one job per LOD, all reading
+            # the same extent-filtered input
+            input_path = prefilter_buildings(input_path)
+            shard_paths = shard_buildings(input_path)
+            if len(shard_paths) == 1:
+                jobs.extend(get_building_lod_jobs(input_path, tile_dir, geojson_file))
+                continue
+
+            # One job per LOD and shard, merged back into one tileset per LOD
+            shard_tile_dir = os.path.join(tile_dir, 'shards')
+            os.makedirs(shard_tile_dir, exist_ok=True)
+            shard_jobs = {}
+            for shard_path in shard_paths:
+                for label, cmd in get_building_lod_jobs(shard_path, shard_tile_dir, os.path.basename(shard_path)):
+                    jobs.append((label, cmd))
+                    lod = label.rsplit('(', 1)[1].rstrip(')')
+                    shard_jobs.setdefault(lod, []).append((label, cmd[cmd.index('-fo') + 1]))
+
+            base_name = os.path.splitext(geojson_file)[0]
+            for lod, shards in shard_jobs.items():
+                merged_path = os.path.join(tile_dir, f"{base_name}_{lod.split('-')[0]}_lod.pmtiles")
+                merges.append((
+                    f"{geojson_file} ({lod})",
+                    ['tile-join', '-f', '--no-tile-size-limit', '-o', merged_path, *(path for _, path in shards)],
+                    [shard_label for shard_label, _ in shards],
+                ))
+        else:
+            jobs.append((geojson_file, build_tippecanoe_cmd(geojson_file, input_path, tile_path)))
+
+    # Start the jobs with the largest inputs first so one big file doesn't run
+    # alone at the end; the sort is stable, so LOD order is kept per input
+    jobs.sort(key=lambda job: os.path.getsize(job[1][-1]), reverse=True)
+
+    # tippecanoe is already multithreaded (-P is --read-parallel), so only run
+    # one process per four cores
+    max_workers = max(1, min(len(jobs), (os.cpu_count() or 4) // 4))
+    log.info(f"Running {len(jobs)} tippecanoe jobs with {max_workers} workers...")
+
+    # Labels of the jobs that failed in this run; a shard tileset left over
+    # from an earlier run must not be merged in place of a failed one
+    failed = set()
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(run_tippecanoe, cmd): label
+            for label, cmd in jobs
+        }
+        for future in as_completed(futures):
+            label = futures[future]
+            try:
+                if future.result():
+                    log.info(f"  ✓ Tiles for {label} generated successfully.")
+                else:
+                    log.info(f"  - Tiles for {label} are up to date, skipped.")
+            except subprocess.CalledProcessError as e:
+                failed.add(label)
+                log.error(f"  ✗ Error generating tiles for {label}: {e} ({e.output})")
+            except FileNotFoundError:
+                log.error("Error: tippecanoe not found. Please make sure it's installed and in your PATH.")
+                for pending in futures:
+                    pending.cancel()
+                return
+
+    for label, cmd, shard_labels in merges:
+        merged_path = cmd[cmd.index('-o') + 1]
+        shard_tiles = cmd[cmd.index('-o') + 2:]
+        failed_shards = [shard_label for shard_label in shard_labels if shard_label in failed]
+        if failed_shards:
+            log.error(f"  ✗ Not merging {label}: {len(failed_shards)} shard tilesets failed.")
+            continue
+        if is_up_to_date(merged_path, max(shard_tiles, key=os.path.getmtime), cmd):
+            log.info(f"  - Merged tiles for {label} are up to date, skipped.")
             continue
-            
-        print(f"Generating tiles for {geojson_file}...")
         try:
-            # tippecanoe settings based on file type
-            if 'water' in geojson_file:
-                # Preserve polygon topology with optimized simplification
-                subprocess.run([
-                    'tippecanoe',
-                    '-fo', tile_path,
-                    '-zg',
-                    '-l', layer_name,
-                    '--detect-shared-borders',  # Better polygon boundary handling
-                    # '--simplification=10',  # Less aggressive simplification for higher quality
-                    '--no-tiny-polygon-reduction',  # Preserve small water bodies
-                    '--low-detail=13',  # Simplified geometry until zoom 13
-                    '--full-detail=15',  # Full detail starting at zoom 15
-                    '--no-feature-limit',  # Don't limit features per tile
-                    '--buffer=64',  # Moderate buffer to prevent edge artifacts
-                    '--drop-fraction-as-needed',  # Better than dropping whole features
-                    '--preserve-input-order',  # Maintain feature order from input
-                    '--coalesce-densest-as-needed',  # Better polygon merging
-                    '--extend-zooms-if-still-dropping',  # Keep trying to fit all features
-                    '--maximum-tile-bytes=1048576',  # 1MB tile limit for higher quality
-                    '-P',
-                    input_path
-                ], check=True)
-            elif 'roads' in geojson_file:
-                subprocess.run([
-                    'tippecanoe',
-                    '-fo', tile_path,
-                    '-z14',  # Match max zoom of map
-                    '-Z11',  # Start at map's minimum zoom level
-                    '-l', layer_name,
-                    # '--simplify-only-low-zooms',  # Keep detail at high zoom levels
-                    '--drop-rate=0.05',  # Keep most features, drop only N%
-                    '--drop-smallest',  # Drop smallest features first
-                    '--simplification=10',  # Use moderate simplification
-                    '--buffer=16',  # buffer for smoother line rendering
-                    '--extend-zooms-if-still-dropping',
-                    '--maximum-tile-bytes=1048576',  # 1MB tile limit for roads
-                    '--coalesce-smallest-as-needed',  # Merge small road segments
-                    '--preserve-input-order',  # Maintain feature order
-                    '--minimum-detail=14',  # Start preserving full detail at zoom 15
-                    '-P',
-                    input_path
-                ], check=True)
-            elif 'building' in geojson_file:
-                # Special handling for buildings - create both low-LOD and high-LOD versions
-                create_building_tiles(input_path, tile_dir, geojson_file)
-            else:
-                # Default settings for other polygon features (land, land_use, etc.)
-                subprocess.run([
-                    'tippecanoe',
-                    '-fo', tile_path,
-                    '-zg',
-                    '-l', layer_name,
-                    '--simplification=10',
-                    '--low-detail=11',  # Simplified geometry until zoom 11
-                    '--full-detail=14',  # Full detail starting at zoom 14
-                    '--drop-densest-as-needed',
-                    '--detect-shared-borders',  # Better polygon boundary handling
-                    '--maximum-tile-bytes=1048576',  # 1MB tile limit for smaller sizes
-                    '--buffer=16',  # Moderate buffer
-                    '--extend-zooms-if-still-dropping',
-                    '-P',
-                    input_path
-                ], check=True)
-            print(f"Tiles for {geojson_file} generated successfully.")
-        except subprocess.CalledProcessError as e:
-            print(f"Error generating tiles for {geojson_file}: {e}")
-        except FileNotFoundError:
-            print("Error: tippecanoe not found. Please make sure it's installed and in your PATH.")
-            break
-
-    print("=== TILE PROCESSING COMPLETE ===\n")
-
-def create_building_tiles(input_path, tile_dir, geojson_file, skip_low_lod=False, skip_medium_lod=False, skip_high_lod=True):
-    """Create separate low-LOD, medium-LOD, and high-LOD building tiles for smooth crossfading"""
-    layer_name = 'layer'
+            subprocess.run(cmd, check=True, capture_output=True)
+            record_build(merged_path, cmd)
+            log.info(f"  ✓ Merged {len(shard_tiles)} shards for {label}.")
+        except (subprocess.CalledProcessError, FileNotFoundError) as e:
+            log.error(f"  ✗ Error merging shards for {label}: {e}")
+
+    log.info("=== TILE PROCESSING COMPLETE ===")
+
+def prefilter_buildings(input_path):
+    """Clip the buffered buildings download to the map extent once
+    
+    The download uses a buffered extent, but every LOD build only needs features
+    intersecting the map extent. Writing that subset to a GeoJSONSeq file once
+    means each LOD build parses far less input. Small files are returned as-is.
+    """
+    if os.path.getsize(input_path) < prefilter_min_bytes:
+        return input_path
+
+    filtered_path = f"{os.path.splitext(input_path)[0]}_filtered.geojsonseq"
+    filter_sql = f"""
+        COPY (
+            SELECT * FROM ST_Read('{input_path}')
+            WHERE ST_Intersects(geom, ST_MakeEnvelope({extent_xmin}, {extent_ymin}, {extent_xmax}, {extent_ymax}))
+        ) TO '{filtered_path}' WITH (FORMAT GDAL, DRIVER 'GeoJSONSeq')
+    """
+    if is_up_to_date(filtered_path, input_path, filter_sql):
+        log.info(f"Pre-filtered {os.path.basename(filtered_path)} is up to date.")
+        return filtered_path
+
+    log.info(f"Pre-filtering {os.path.basename(input_path)} to map extent...")
+
+    conn = duckdb.connect()
+    try:
+        conn.execute("INSTALL spatial; LOAD spatial;")
+        conn.execute(filter_sql)
+        record_build(filtered_path, filter_sql)
+        log.info(f"  ✓ Wrote {os.path.basename(filtered_path)}")
+        return filtered_path
+    except Exception as e:
+        log.error(f"  ✗ Error pre-filtering buildings, using full input: {e}")
+        return input_path
+    finally:
+        conn.close()
+
+def shard_buildings(input_path, k=shard_grid_size):
+    """Split a large buildings file into a k x k grid of GeoJSONSeq shards
+    
+    Each feature goes to the shard containing its centroid, so no building is
+    duplicated. The outer shards are open-ended, which also catches features
+    whose centroid lies just outside the map extent. Small files are returned
+    as a single-item list.
+    """
+    if k < 2 or os.path.getsize(input_path) < prefilter_min_bytes:
+        return [input_path]
+
+    base_path = os.path.splitext(input_path)[0]
+    x_step = (extent_xmax - extent_xmin) / k
+    y_step = (extent_ymax - extent_ymin) / k
+
+    shard_paths = []
+    conn = duckdb.connect()
+    try:
+        conn.execute("INSTALL spatial; LOAD spatial;")
+        for row, col in itertools.product(range(k), range(k)):
+            shard_path = f"{base_path}_shard_{row}_{col}.geojsonseq"
+            conditions = []
+            if col > 0:
+                conditions.append(f"ST_X(ST_Centroid(geom)) >= {extent_xmin + col * x_step}")
+            if col < k - 1:
+                conditions.append(f"ST_X(ST_Centroid(geom)) < {extent_xmin + (col + 1) * x_step}")
+            if row > 0:
+                conditions.append(f"ST_Y(ST_Centroid(geom)) >= {extent_ymin + row * y_step}")
+            if row < k - 1:
+                conditions.append(f"ST_Y(ST_Centroid(geom)) < {extent_ymin + (row + 1) * y_step}")
+            shard_sql = f"""
+                COPY (
+                    SELECT * FROM ST_Read('{input_path}')
+                    WHERE {' AND '.join(conditions)}
+                ) TO '{shard_path}' WITH (FORMAT GDAL, DRIVER 'GeoJSONSeq')
+            """
+            if not is_up_to_date(shard_path, input_path, shard_sql):
+                conn.execute(shard_sql)
+                record_build(shard_path, shard_sql)
+            shard_paths.append(shard_path)
+        log.info(f"  ✓ Split {os.path.basename(input_path)} into {len(shard_paths)} shards")
+        return shard_paths
+    except Exception as e:
+        log.error(f"  ✗ Error sharding buildings, tiling the whole file: {e}")
+        return [input_path]
+    finally:
+        conn.close()
+
+def get_building_lod_jobs(input_path, tile_dir, geojson_file, skip_low_lod=False, skip_medium_lod=False, skip_high_lod=True):
+    """Build (label, command) tippecanoe jobs for the low-, medium-, and high-LOD building tiles"""
     base_name = os.path.splitext(geojson_file)[0]
+    jobs = []
 
-    if not skip_low_lod:
-        # Low-LOD buildings: aggressive simplification for performance
-        low_lod_path = os.path.join(tile_dir, f"{base_name}_low_lod.pmtiles")
-        print(f"Generating low-LOD building tiles for {geojson_file}...")
+    # High-LOD builds take the longest, so they are listed first
+    for lod, skip in (('high', skip_high_lod), ('medium', skip_medium_lod), ('low', skip_low_lod)):
+        if skip:
+            continue
+        lod_path = os.path.join(tile_dir, f"{base_name}_{lod}_lod.pmtiles")
+        jobs.append((
+            f"{geojson_file} ({lod}-LOD)",
+            build_tippecanoe_cmd(geojson_file, input_path, lod_path, profile=f"building_{lod}_lod"),
+        ))
 
-        try:
-            subprocess.run([
-                'tippecanoe',
-                '-fo', low_lod_path,
-                '-z9',  # Lower max zoom for low-LOD
-                '-Z0',  # Start at zoom 0
-                '-l', layer_name,
-                '--simplification=10',  # Less aggressive simplification to preserve building shapes
-                '--drop-rate=0.25',     # Drop N% of features
-                '--drop-smallest',     # Drop smallest buildings first
-                '--buffer=32',          # Smaller buffer for tighter tiles
-                '--maximum-tile-bytes=2097152',  # 2MB tiles for better detail
-                '--coalesce-smallest-as-needed',
-                '--detect-shared-borders',
-                '-P',
-                input_path
-            ], check=True)
-            print(f"  ✓ Low-LOD building tiles generated successfully.")
-        except subprocess.CalledProcessError as e:
-            print(f"  ✗ Error generating low-LOD building tiles: {e}")
-            return
+    return jobs
 
-    if not skip_medium_lod:
-        # Medium-LOD buildings: balance detail and performance
-        medium_lod_path = os.path.join(tile_dir, f"{base_name}_medium_lod.pmtiles")
-        print(f"Generating medium-LOD building tiles for {geojson_file}...")
+def stream_theme_to_pmtiles(section, tile_dir, parallel_sections=1):
+    """Stream one COPY section from the DuckDB CLI straight into tippecanoe
+    
+    The query result is written to stdout as GeoJSONSeq and piped into
+    tippecanoe's stdin, so no intermediate file is written and tippecanoe can
+    start reading features while DuckDB is still producing them.
+    """
+    match = copy_section_pattern.match(section)
+    if not match:
+        raise ValueError("Section is not a COPY (...) TO '...' statement")
 
-        try:
-            subprocess.run([
-                'tippecanoe',
-                '-fo', medium_lod_path,
-                '-z13',  # Max zoom for medium-LOD
-                '-Z10',  # Start at zoom 10
-                '-l', layer_name,
-                '--simplification=10',
-                '--drop-rate=0.1',     # Drop N% of features
-                '--drop-smallest',     # Drop smallest buildings first
-                '--buffer=16',          # Moderate buffer
-                '--maximum-tile-bytes=2097152',  # 2MB tiles for better detail
-                '--coalesce-smallest-as-needed',
-                '--detect-shared-borders',
-                '-P',
-                input_path
-            ], check=True)
-            print(f"  ✓ Medium-LOD building tiles generated successfully.")
-        except subprocess.CalledProcessError as e:
-            print(f"  ✗ Error generating medium-LOD building tiles: {e}")
-            return
+    output_file = os.path.basename(match.group('output'))
+    tile_path = os.path.join(tile_dir, f"{os.path.splitext(output_file)[0]}.pmtiles")
+    streaming_sql = (
+        f"{get_section_setup_sql(parallel_sections)}{match.group('setup')}"
+        f"COPY ({match.group('query')}) TO '/vsistdout/' "
+        f"WITH (FORMAT GDAL, DRIVER 'GeoJSONSeq', SRS 'EPSG:4326');"
+    )
 
-    if not skip_high_lod:
-        # High-LOD buildings: preserve more detail, start later for clear distinction
-        high_lod_path = os.path.join(tile_dir, f"{base_name}_high_lod.pmtiles")
-        print(f"Generating high-LOD building tiles for {geojson_file}...")
+    duck = subprocess.Popen(['duckdb', '-c', streaming_sql], stdout=subprocess.PIPE)
+    with open(f"{tile_path}.log", 'w') as log_file:
+        tip = subprocess.Popen(
+            build_tippecanoe_cmd(output_file, None, tile_path),
+            stdin=duck.stdout, stdout=log_file, stderr=subprocess.STDOUT
+        )
+        duck.stdout.close()  # Let DuckDB see a broken pipe if tippecanoe exits early
+        tip_returncode = tip.wait()
+    duck_returncode = duck.wait()
 
-        try:
-            subprocess.run([
-                'tippecanoe',
-                '-fo', high_lod_path,
-                '-z16',  # Higher max zoom for high-LOD
-                '-Z14',  # Start at zoom 14
-                '-l', layer_name,
-                '--simplification=8',  # Lower simplification for higher detail
-                '--drop-rate=0.05',     # Drop 20% of features
-                '--drop-smallest',     # Drop smallest buildings first
-                '--buffer=8',          # Larger buffer for smoother transitions
-                '--maximum-tile-bytes=2097152',  # 2MB tiles for better detail
-                '--coalesce-smallest-as-needed',
-                '--detect-shared-borders',
-                '--preserve-input-order',
-                '-P',
-                input_path
-            ], check=True)
-            print(f"  ✓ High-LOD building tiles generated successfully.")
-        except subprocess.CalledProcessError as e:
-            print(f"  ✗ Error generating high-LOD building tiles: {e}")
+    if duck_returncode:
+        raise subprocess.CalledProcessError(duck_returncode, 'duckdb')
+    if tip_returncode:
+        raise subprocess.CalledProcessError(tip_returncode, tip.args)
+
+def stream_to_tiles():
+    """Download and tile every theme in one pass, without intermediate files
+    
+    Buildings are skipped because their three LOD builds all read the same
+    file; use the download and tiles commands for those.
+    """
+    log.info("=== STREAMING SOURCE DATA TO TILES ===")
+
+    tile_dir = '/Users/matthewheaton/GitHub/basemap/overture/tiles/'
+    os.makedirs(tile_dir, exist_ok=True)
+
+    sections = []
+    for i, section in read_sql_sections():
+        url_info = get_db_url(section)
+        if url_info and 'building' in url_info['output_file']:
+            log.info(f"Skipping section {i + 1} ({url_info['output_file']}); buildings need the two-step pipeline.")
+            continue
+        sections.append((i, section))
+
+    if not sections:
+        log.info("No SQL sections to stream.")
+        return
+
+    max_workers = max(1, min(len(sections), (os.cpu_count() or 4) // 4))
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(stream_theme_to_pmtiles, section, tile_dir, max_workers): i
+            for i, section in sections
+        }
+        for future in as_completed(futures):
+            i = futures[future]
+            try:
+                future.result()
+                log.info(f"  ✓ Section {i + 1} streamed to tiles successfully.")
+            except (subprocess.CalledProcessError, ValueError) as e:
+                log.error(f"  ✗ Error streaming section {i + 1}: {e}")
+            except FileNotFoundError:
+                log.error("Error: duckdb or tippecanoe not found. Please make sure both CLIs are installed and in your PATH.")
+
+    log.info("=== STREAMING COMPLETE ===")
 
 def get_db_url(sql_section):
     """Extract URL and data type information from a SQL section"""
-    # Define patterns to match different Overture data sources
-    patterns = [
-        # S3 patterns
-        {
-            'pattern': r"read_parquet\('(s3://overturemaps-us-west-2/release/[\d-]+\.\d+/theme=([^/]+)/type=([^/]+)/\*)'",
-            'description_template': "Downloading {data_type} data from Overture Maps ({theme} theme)",
-        },
-        # Azure blob patterns
-        {
-            'pattern': r"read_parquet\('(az://overturemapswestus2\.blob\.core\.windows\.net/release/[\d-]+[\w.-]*/theme=([^/]+)/type=([^/]+)/\*)'",
-            'description_template': "Downloading {data_type} data from Overture Maps ({theme} theme)",
-        },
-        # Places pattern (special case with wildcards)
-        {
-            'pattern': r"read_parquet\('(s3://overturemaps-us-west-2/release/[\d-]+\.\d+/theme=([^/]+)/\*)/\*'",
-            'description_template': "Downloading {theme} data from Overture Maps",
-        }
-    ]
-    
     # Extract output file path
-    output_match = re.search(r"TO '([^']+)'", sql_section)
+    output_match = output_file_pattern.search(sql_section)
     output_file = output_match.group(1).split('/')[-1] if output_match else "unknown"
     
     # Try to match each pattern
-    for pattern_info in patterns:
-        match = re.search(pattern_info['pattern'], sql_section)
+    for pattern, description_template in db_url_patterns:
+        match = pattern.search(sql_section)
         if match:
             url = match.group(1)
             theme = match.group(2)
@@ -334,7 +799,7 @@ def get_db_url(sql_section):
                 data_type = theme
                 
             # Format the description
-            description = pattern_info['description_template'].format(
+            description = description_template.format(
                 data_type=data_type.replace('_', ' ').title(),
                 theme=theme.replace('_', ' ').title()
             )
@@ -349,25 +814,54 @@ def get_db_url(sql_section):
     
     return None
 
-if __name__ == "__main__":
-    import sys
-    
-    if len(sys.argv) < 2:
-        print("Usage:")
-        print("  python runCreateTiles.py download    # Download source data only")
-        print("  python runCreateTiles.py tiles       # Process to tiles only")
-        print("  python runCreateTiles.py all         # Run both steps")
-        sys.exit(1)
-    
-    command = sys.argv[1].lower()
+def positive_int(value):
+    """argparse type for a whole number greater than zero"""
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid int value: {value!r}")
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {number}")
+    return number
+
+def main():
+    """Command line entry point"""
+    global duckdb_memory_gb
+
+    parser = argparse.ArgumentParser(
+        description='Download Overture data and build PMTiles',
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument('command', choices=['download', 'export', 'tiles', 'all', 'stream'], type=str.lower,
+                        help='download: source data only; export: rewrite source data from the cache only; '
+                             'tiles: process to tiles only; all: download and tiles; '
+                             'stream: stream downloads straight into tippecanoe')
+    parser.add_argument('--mem-gb', type=positive_int, default=duckdb_memory_gb,
+                        help='DuckDB memory limit in GB')
+    args = parser.parse_args()
+
+    duckdb_memory_gb = args.mem_gb
+    command = args.command
     
-    if command == "download":
-        download_source_data()
-    elif command == "tiles":
-        process_to_tiles()
-    elif command == "all":
-        download_source_data()
-        process_to_tiles()
-    else:
-        print(f"Unknown command: {command}")
-        print("Use: download, tiles, or all")
\ No newline at end of file
+    # Run the log listener only for the duration of the command, and stop it
+    # on the way out so every queued record is written before exit
+    log.addHandler(log_queue_handler)
+    log_listener.start()
+    try:
+        if command == "download":
+            download_source_data()
+        elif command == "export":
+            export_source_data()
+        elif command == "tiles":
+            process_to_tiles()
+        elif command == "all":
+            download_source_data()
+            process_to_tiles()
+        elif command == "stream":
+            stream_to_tiles()
+    finally:
+        log_listener.stop()
+        log.removeHandler(log_queue_handler)
+
+if __name__ == "__main__":
+    main()